@@ -43,11 +43,11 @@ def fetch_active_fires(
         days: Days to look back
         bbox: Bounding box (west, south, east, north). If None, uses continental US.
     """
-    client = FIRMSClient(api_key)
-    if bbox is None:
-        return client.get_continental_us_fires(days)
-    else:
-        return client.get_active_fires(bbox, days)
+    with FIRMSClient(api_key) as client:
+        if bbox is None:
+            return client.get_continental_us_fires(days)
+        else:
+            return client.get_active_fires(bbox, days)
 
 
 @task
@@ -99,8 +99,8 @@ def enrich_with_weather(fires_gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
 @task
 def enrich_with_aqi(fires_gdf: gpd.GeoDataFrame, api_key: str) -> gpd.GeoDataFrame:
     """Enrich fires with AirNow air quality data."""
-    airnow = AirNowClient(api_key)
-    return airnow.enrich_fires_with_aqi(fires_gdf)
+    with AirNowClient(api_key) as airnow:
+        return airnow.enrich_fires_with_aqi(fires_gdf)
 
 
 @task
@@ -108,8 +108,8 @@ def enrich_with_purpleair(
     fires_gdf: gpd.GeoDataFrame, api_key: str
 ) -> gpd.GeoDataFrame:
     """Enrich fires with PurpleAir sensor data."""
-    purpleair = PurpleAirClient(api_key)
-    return purpleair.enrich_fires_with_purpleair(fires_gdf)
+    with PurpleAirClient(api_key) as purpleair:
+        return purpleair.enrich_fires_with_purpleair(fires_gdf)
 
 
 @task
@@ -202,8 +202,8 @@ async def enrich_aqi_tool(args: Dict[str, Any]) -> str:
     log("   Fetching AQI data from EPA AirNow API...")
 
     # Enrich with AQI data
-    airnow_client = AirNowClient(airnow_key)
-    enriched_gdf = airnow_client.enrich_fires_with_aqi(fires_gdf)
+    with AirNowClient(airnow_key) as airnow_client:
+        enriched_gdf = airnow_client.enrich_fires_with_aqi(fires_gdf)
 
     log("   Saving enriched data...")
 
@@ -265,10 +265,10 @@ async def enrich_purpleair_tool(args: Dict[str, Any]) -> str:
     log("   Fetching PM2.5 data from PurpleAir sensors...")
 
     # Enrich with PurpleAir data
-    purpleair_client = PurpleAirClient(purpleair_key)
-    enriched_gdf = purpleair_client.enrich_fires_with_purpleair(
-        fires_gdf, radius_km=radius_km
-    )
+    with PurpleAirClient(purpleair_key) as purpleair_client:
+        enriched_gdf = purpleair_client.enrich_fires_with_purpleair(
+            fires_gdf, radius_km=radius_km
+        )
 
     log("   Saving enriched data...")
 
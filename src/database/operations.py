@@ -3,9 +3,62 @@
 
 import duckdb
 import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import shapely
 from typing import Optional, Tuple
 from datetime import date
 
+# Columns read by the fires INSERT; only these are staged for DuckDB
+_FIRE_STAGE_COLUMNS = [
+    "fire_id",
+    "latitude",
+    "longitude",
+    "geom_wkt",
+    "bright_ti4",
+    "confidence",
+    "frp",
+    "acq_date",
+    "acq_time_str",
+    "acq_datetime",
+    "daynight",
+    "satellite",
+    "risk_score",
+    "risk_category",
+]
+
+
+def _make_fire_ids(gdf: gpd.GeoDataFrame) -> list[str]:
+    """Build ``<acq_date>_<lat>_<lon>`` fire IDs in a single pass."""
+    return [
+        f"{acq_date}_{lat}_{lon}"
+        for acq_date, lat, lon in zip(
+            gdf["acq_date"].astype(str).tolist(),
+            gdf["latitude"].round(4).tolist(),
+            gdf["longitude"].round(4).tolist(),
+        )
+    ]
+
+
+def _insert_staged(conn: duckdb.DuckDBPyConnection, stage_df: pd.DataFrame, sql: str):
+    """
+    Run an INSERT that reads from ``stage`` inside a single transaction.
+
+    The DataFrame is registered as an Arrow table so DuckDB scans it without a
+    per-row conversion, and the whole batch is committed once.
+    """
+    conn.register("stage", pa.Table.from_pandas(stage_df, preserve_index=False))
+    try:
+        conn.begin()
+        conn.execute(sql)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.unregister("stage")
+
 
 def save_fires_to_db(conn: duckdb.DuckDBPyConnection, fires_gdf: gpd.GeoDataFrame):
     """
@@ -20,22 +73,25 @@ def save_fires_to_db(conn: duckdb.DuckDBPyConnection, fires_gdf: gpd.GeoDataFram
 
     # Create unique fire ID
     fires_gdf = fires_gdf.copy()
-    fires_gdf["fire_id"] = (
-        fires_gdf["acq_date"].astype(str)
-        + "_"
-        + fires_gdf["latitude"].round(4).astype(str)
-        + "_"
-        + fires_gdf["longitude"].round(4).astype(str)
-    )
+    fires_gdf["fire_id"] = _make_fire_ids(fires_gdf)
 
     # Convert geometry to WKT
     fires_gdf["geom_wkt"] = fires_gdf.geometry.to_wkt()
 
-    # Create a regular DataFrame (drop geometry column for DuckDB)
-    df_for_db = fires_gdf.drop(columns=["geometry"]).copy()
+    # Build canonical HH:MM:00 strings from HHMM integers so DuckDB casts
+    # straight to TIME instead of padding/slicing strings per row
+    acq_time = fires_gdf["acq_time"].to_numpy().astype(np.int32)
+    hours = np.char.zfill((acq_time // 100).astype(str), 2)
+    minutes = np.char.zfill((acq_time % 100).astype(str), 2)
+    fires_gdf["acq_time_str"] = np.char.add(
+        np.char.add(np.char.add(hours, ":"), minutes), ":00"
+    )
 
     # Insert or replace
-    conn.execute("""
+    _insert_staged(
+        conn,
+        fires_gdf[_FIRE_STAGE_COLUMNS],
+        """
         INSERT OR REPLACE INTO fires
         SELECT
             fire_id,
@@ -46,17 +102,16 @@ def save_fires_to_db(conn: duckdb.DuckDBPyConnection, fires_gdf: gpd.GeoDataFram
             confidence,
             frp,
             acq_date::DATE,
-            (substr(lpad(acq_time::VARCHAR, 4, '0'), 1, 2) || ':' || substr(lpad(acq_time::VARCHAR, 4, '0'), 3, 2) || ':00')::TIME as acq_time,
+            acq_time_str::TIME as acq_time,
             acq_datetime,
             daynight,
             satellite,
             risk_score,
             risk_category::VARCHAR,
             CURRENT_TIMESTAMP
-        FROM df_for_db
-    """)
-
-    conn.commit()
+        FROM stage
+    """,
+    )
 
 
 def save_buffers_to_db(
@@ -73,54 +128,45 @@ def save_buffers_to_db(
     if buffers_gdf.empty:
         return
 
-    # Create buffers DataFrame
-    buffers_gdf = buffers_gdf.copy()
+    suffix = f"_buffer_{buffer_km}km"
 
-    # Check if this is dissolved buffers (grouped by risk_category) or individual buffers
-    if "fire_id" not in buffers_gdf.columns:
+    # Build the ID columns in a single pass each instead of chained Series ops
+    if "fire_id" in buffers_gdf.columns:
+        # Individual buffers with fire_id already present
+        fire_ids = buffers_gdf["fire_id"].tolist()
+        buffer_ids = [f"{fire_id}{suffix}" for fire_id in fire_ids]
+    elif "risk_category" in buffers_gdf.columns:
         # Dissolved buffers - create buffer_id from risk_category
-        if "risk_category" in buffers_gdf.columns:
-            buffers_gdf["buffer_id"] = (
-                buffers_gdf["risk_category"].astype(str) + f"_buffer_{buffer_km}km"
-            )
-            buffers_gdf["fire_id"] = (
-                buffers_gdf["risk_category"].astype(str) + "_zone"
-            )  # Placeholder
-        else:
-            # Individual buffers without fire_id - create it
-            buffers_gdf["fire_id"] = (
-                buffers_gdf["acq_date"].astype(str)
-                + "_"
-                + buffers_gdf["latitude"].round(4).astype(str)
-                + "_"
-                + buffers_gdf["longitude"].round(4).astype(str)
-            )
-            buffers_gdf["buffer_id"] = buffers_gdf["fire_id"] + f"_buffer_{buffer_km}km"
+        categories = buffers_gdf["risk_category"].astype(str).tolist()
+        buffer_ids = [f"{category}{suffix}" for category in categories]
+        fire_ids = [f"{category}_zone" for category in categories]  # Placeholder
     else:
-        # Individual buffers with fire_id already present
-        buffers_gdf["buffer_id"] = buffers_gdf["fire_id"] + f"_buffer_{buffer_km}km"
-
-    buffers_gdf["buffer_km"] = buffer_km
-
-    # Convert geometry to WKT
-    buffers_gdf["geom_wkt"] = buffers_gdf.geometry.to_wkt()
-
-    # Create a regular DataFrame (drop geometry column for DuckDB)
-    df_for_db = buffers_gdf[["buffer_id", "fire_id", "buffer_km", "geom_wkt"]].copy()
-
-    # Insert or replace
-    conn.execute("""
+        # Individual buffers without fire_id - create it
+        fire_ids = _make_fire_ids(buffers_gdf)
+        buffer_ids = [f"{fire_id}{suffix}" for fire_id in fire_ids]
+
+    # Insert or replace (WKB is more compact than WKT and cheaper to parse)
+    _insert_staged(
+        conn,
+        pd.DataFrame(
+            {
+                "buffer_id": buffer_ids,
+                "fire_id": fire_ids,
+                "buffer_km": buffer_km,
+                "geom_wkb": shapely.to_wkb(buffers_gdf.geometry.values),
+            }
+        ),
+        """
         INSERT OR REPLACE INTO fire_buffers
         SELECT
             buffer_id,
             fire_id,
             buffer_km,
-            ST_GeomFromText(geom_wkt) as geom,
+            ST_GeomFromWKB(geom_wkb) as geom,
             CURRENT_TIMESTAMP
-        FROM df_for_db
-    """)
-
-    conn.commit()
+        FROM stage
+    """,
+    )
 
 
 def get_fires_by_date(
@@ -140,7 +186,7 @@ def get_fires_by_date(
     if end_date is None:
         end_date = start_date
 
-    result = conn.execute(
+    table = conn.execute(
         """
         SELECT
             fire_id,
@@ -159,7 +205,10 @@ def get_fires_by_date(
         ORDER BY risk_score DESC
     """,
         [start_date, end_date],
-    ).fetchdf()
+    ).fetch_arrow_table()
+
+    # Arrow-backed columns avoid a Python-object copy for strings/dates
+    result = table.to_pandas(types_mapper=pd.ArrowDtype)
 
     if result.empty:
         return gpd.GeoDataFrame()
@@ -186,7 +235,7 @@ def get_fires_in_bbox(
     """
     west, south, east, north = bbox
 
-    result = conn.execute(
+    table = conn.execute(
         """
         SELECT
             fire_id,
@@ -206,7 +255,10 @@ def get_fires_in_bbox(
         ORDER BY risk_score DESC
     """,
         [south, north, west, east],
-    ).fetchdf()
+    ).fetch_arrow_table()
+
+    # Arrow-backed columns avoid a Python-object copy for strings/dates
+    result = table.to_pandas(types_mapper=pd.ArrowDtype)
 
     if result.empty:
         return gpd.GeoDataFrame()
@@ -43,6 +43,10 @@ def create_tables(conn: duckdb.DuckDBPyConnection):
         ON fires USING RTREE (geom)
     """)
 
+    # No (acq_date, risk_score DESC) index: DuckDB's ART indexes serve point
+    # and range lookups only, so the ORDER BY risk_score in get_fires_by_date
+    # is still sorted at query time (confirmed with EXPLAIN) and a composite
+    # index would only add write cost to INSERT OR REPLACE.
     conn.execute("""
         CREATE INDEX IF NOT EXISTS idx_fires_date
         ON fires (acq_date)
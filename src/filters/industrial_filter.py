@@ -7,13 +7,48 @@ actual wildfires.
 """
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
+import shapely
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 from datetime import datetime, timedelta
 import duckdb
 
 
+# Historical fires snapped to grid cells; bound parameters keep the SQL text
+# constant so DuckDB can reuse the plan and no values are interpolated.
+_PERSISTENT_ANOMALY_QUERY = """
+WITH gridded_fires AS (
+    SELECT
+        FLOOR(latitude / $grid_size) * $grid_size as grid_lat,
+        FLOOR(longitude / $grid_size) * $grid_size as grid_lon,
+        COUNT(*) as detection_count,
+        AVG(latitude) as avg_lat,
+        AVG(longitude) as avg_lon,
+        MIN(acq_date) as first_detection,
+        MAX(acq_date) as last_detection,
+        COUNT(DISTINCT acq_date) as unique_days
+    FROM fires
+    WHERE acq_date >= $start_date
+    GROUP BY grid_lat, grid_lon
+    HAVING COUNT(*) >= $threshold
+)
+SELECT
+    grid_lat,
+    grid_lon,
+    avg_lat as latitude,
+    avg_lon as longitude,
+    detection_count,
+    unique_days,
+    first_detection,
+    last_detection,
+    ROUND(detection_count::FLOAT / unique_days, 2) as detections_per_day
+FROM gridded_fires
+ORDER BY detection_count DESC
+"""
+
+
 class IndustrialHeatFilter:
     """
     Filter out persistent thermal anomalies from industrial sources.
@@ -33,6 +68,41 @@ class IndustrialHeatFilter:
         self.db_path = db_path
         self.persistent_locations = None
 
+        # EPSG:5070 projection of persistent_locations and spatial indexes of
+        # their buffers keyed by radius in meters, reused across filter_fires()
+        self._persistent_locations_5070 = None
+        self._persistent_trees: Dict[float, shapely.STRtree] = {}
+
+    def _set_persistent_locations(
+        self, persistent_locations: Optional[gpd.GeoDataFrame]
+    ):
+        """Store persistent locations and pre-project them for filtering."""
+        self.persistent_locations = persistent_locations
+        self._persistent_trees = {}
+        if persistent_locations is None or len(persistent_locations) == 0:
+            self._persistent_locations_5070 = None
+        else:
+            self._persistent_locations_5070 = persistent_locations.to_crs("EPSG:5070")
+
+    def _get_persistent_tree(
+        self, persistent_locations: gpd.GeoDataFrame, buffer_m: float
+    ) -> shapely.STRtree:
+        """Return an STRtree of buffers around persistent locations (EPSG:5070)."""
+        if persistent_locations is not self.persistent_locations:
+            # Ad-hoc locations passed by the caller are not cached
+            persistent_proj = persistent_locations.to_crs("EPSG:5070")
+            return shapely.STRtree(
+                shapely.buffer(persistent_proj.geometry.values, buffer_m)
+            )
+
+        if buffer_m not in self._persistent_trees:
+            self._persistent_trees[buffer_m] = shapely.STRtree(
+                shapely.buffer(
+                    self._persistent_locations_5070.geometry.values, buffer_m
+                )
+            )
+        return self._persistent_trees[buffer_m]
+
     def identify_persistent_anomalies(
         self,
         lookback_days: int = 30,
@@ -61,43 +131,20 @@ class IndustrialHeatFilter:
             conn.load_extension("spatial")
 
             # Calculate date threshold
-            start_date = (datetime.now() - timedelta(days=lookback_days)).strftime(
-                "%Y-%m-%d"
-            )
-
-            # Query historical fires and snap to grid
-            query = f"""
-            WITH gridded_fires AS (
-                SELECT
-                    FLOOR(latitude / {grid_size_km}) * {grid_size_km} as grid_lat,
-                    FLOOR(longitude / {grid_size_km}) * {grid_size_km} as grid_lon,
-                    COUNT(*) as detection_count,
-                    AVG(latitude) as avg_lat,
-                    AVG(longitude) as avg_lon,
-                    MIN(acq_date) as first_detection,
-                    MAX(acq_date) as last_detection,
-                    COUNT(DISTINCT acq_date) as unique_days
-                FROM fires
-                WHERE acq_date >= '{start_date}'
-                GROUP BY grid_lat, grid_lon
-                HAVING COUNT(*) >= {detection_threshold}
-            )
-            SELECT
-                grid_lat,
-                grid_lon,
-                avg_lat as latitude,
-                avg_lon as longitude,
-                detection_count,
-                unique_days,
-                first_detection,
-                last_detection,
-                ROUND(detection_count::FLOAT / unique_days, 2) as detections_per_day
-            FROM gridded_fires
-            ORDER BY detection_count DESC
-            """
-
-            result = conn.execute(query).fetchdf()
+            start_date = (datetime.now() - timedelta(days=lookback_days)).date()
+
+            # Fetch as Arrow to skip DuckDB's row-wise pandas materialization.
+            # Keep numpy-backed columns here: the result is written to GeoJSON.
+            table = conn.execute(
+                _PERSISTENT_ANOMALY_QUERY,
+                {
+                    "grid_size": grid_size_km,
+                    "start_date": start_date,
+                    "threshold": detection_threshold,
+                },
+            ).fetch_arrow_table()
             conn.close()
+            result = table.to_pandas()
 
             if len(result) == 0:
                 print(
@@ -106,17 +153,14 @@ class IndustrialHeatFilter:
                 return gpd.GeoDataFrame()
 
             # Convert to GeoDataFrame
-            from shapely.geometry import Point
-
-            geometry = [
-                Point(lon, lat)
-                for lon, lat in zip(result["longitude"], result["latitude"])
-            ]
+            geometry = shapely.points(
+                result["longitude"].to_numpy(), result["latitude"].to_numpy()
+            )
 
             gdf = gpd.GeoDataFrame(result, geometry=geometry, crs="EPSG:4326")
 
             # Store for filtering
-            self.persistent_locations = gdf
+            self._set_persistent_locations(gdf)
 
             print(f"Identified {len(gdf)} persistent thermal anomalies:")
             print(f"  - Lookback: {lookback_days} days")
@@ -155,28 +199,21 @@ class IndustrialHeatFilter:
             )
             return fires_gdf, gpd.GeoDataFrame()
 
-        # Project to meters for accurate buffering
+        # Project to meters for accurate buffering (persistent locations are
+        # projected and buffered once, then cached)
         fires_proj = fires_gdf.to_crs("EPSG:5070")
-        persistent_proj = persistent_locations.to_crs("EPSG:5070")
-
-        # Create buffer around persistent locations
         buffer_m = buffer_km * 1000
-        persistent_buffer = persistent_proj.geometry.buffer(buffer_m).unary_union
+        tree = self._get_persistent_tree(persistent_locations, buffer_m)
 
-        # Identify fires within buffer (likely industrial)
-        fires_proj["is_industrial"] = fires_proj.geometry.within(persistent_buffer)
+        # Identify fires within any buffer (likely industrial); the STRtree
+        # only tests buffers whose bounding boxes contain the fire
+        fire_idx, _ = tree.query(fires_proj.geometry.values, predicate="within")
+        is_industrial = np.zeros(len(fires_proj), dtype=bool)
+        is_industrial[fire_idx] = True
 
-        # Split into filtered and excluded
-        filtered_fires = (
-            fires_proj[~fires_proj["is_industrial"]].to_crs("EPSG:4326").copy()
-        )
-        excluded_fires = (
-            fires_proj[fires_proj["is_industrial"]].to_crs("EPSG:4326").copy()
-        )
-
-        # Remove temporary column
-        filtered_fires = filtered_fires.drop(columns=["is_industrial"])
-        excluded_fires = excluded_fires.drop(columns=["is_industrial"])
+        # Split the original (unprojected) fires so no reprojection back is needed
+        filtered_fires = fires_gdf[~is_industrial].copy()
+        excluded_fires = fires_gdf[is_industrial].copy()
 
         print(f"Filtered {len(excluded_fires)} likely industrial heat sources")
         print(f"Retained {len(filtered_fires)} probable wildland fires")
@@ -219,14 +256,14 @@ class IndustrialHeatFilter:
             GeoDataFrame with persistent locations or None if file not found
         """
         try:
-            self.persistent_locations = gpd.read_file(input_path)
+            self._set_persistent_locations(gpd.read_file(input_path))
             print(
                 f"Loaded {len(self.persistent_locations)} persistent anomalies from {input_path}"
             )
             return self.persistent_locations
         except Exception as e:
             print(f"Could not load persistent locations from {input_path}: {e}")
-            self.persistent_locations = None
+            self._set_persistent_locations(None)
             return None
 
 
@@ -251,18 +288,16 @@ def create_industrial_exclusion_zone(
         "US Steel Gary Works",41.5933,-87.3403,steel_plant
         "BP Whiting Refinery",41.6764,-87.4995,refinery
     """
-    from shapely.geometry import Point
-
     # Load facilities
     df = pd.read_csv(facilities_csv)
 
     # Create GeoDataFrame
-    geometry = [Point(lon, lat) for lon, lat in zip(df["longitude"], df["latitude"])]
+    geometry = shapely.points(df["longitude"].to_numpy(), df["latitude"].to_numpy())
     gdf = gpd.GeoDataFrame(df, geometry=geometry, crs="EPSG:4326")
 
     # Buffer in projected CRS
     gdf_proj = gdf.to_crs("EPSG:5070")
-    gdf_proj["geometry"] = gdf_proj.geometry.buffer(buffer_km * 1000)
+    gdf_proj["geometry"] = shapely.buffer(gdf_proj.geometry.values, buffer_km * 1000)
 
     # Convert back
     return gdf_proj.to_crs("EPSG:4326")
@@ -22,6 +22,7 @@ Data Notes:
 import httpx
 from typing import Dict, List, Optional, Any
 import geopandas as gpd
+import pandas as pd
 from datetime import datetime, timedelta
 import time
 
@@ -48,6 +49,14 @@ class AirNowClient:
         self.cache_hours = cache_hours
         self._cache: Dict[str, tuple[datetime, Any]] = {}
 
+        # Long-lived client so keep-alive connections and TLS sessions are
+        # reused across requests (and across retries)
+        self.client = httpx.Client(
+            timeout=10.0,
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=4),
+        )
+
     def _get_cache_key(self, lat: float, lon: float, distance: int) -> str:
         """Generate cache key for a location query."""
         return f"{lat:.4f},{lon:.4f},{distance}"
@@ -109,7 +118,7 @@ class AirNowClient:
 
         for attempt in range(max_retries):
             try:
-                response = httpx.get(url, params=params, timeout=10.0)
+                response = self.client.get(url, params=params)
                 response.raise_for_status()
 
                 data = response.json()
@@ -172,15 +181,13 @@ class AirNowClient:
         if fires_gdf.empty:
             return fires_gdf
 
-        fires_enriched = fires_gdf.copy()
-
-        # Initialize new columns
-        fires_enriched["aqi"] = None
-        fires_enriched["aqi_parameter"] = None
-        fires_enriched["aqi_category"] = None
-        fires_enriched["aqi_category_number"] = None
+        # Collect values per column and assign them once after the loop
+        aqi_values: List[Optional[float]] = []
+        aqi_parameters: List[Optional[str]] = []
+        aqi_categories: List[Optional[str]] = []
+        aqi_category_numbers: List[Optional[int]] = []
 
-        total_fires = len(fires_enriched)
+        total_fires = len(fires_gdf)
         import sys
 
         print(
@@ -189,40 +196,44 @@ class AirNowClient:
             flush=True,
         )
 
-        for idx, row in fires_enriched.iterrows():
-            lat = row["latitude"]
-            lon = row["longitude"]
-
+        for i, (lat, lon) in enumerate(
+            zip(fires_gdf["latitude"], fires_gdf["longitude"])
+        ):
             # Get AQI data
-            aqi_data = self.get_current_observation(lat, lon, distance)
+            aqi_data = self.get_current_observation(lat, lon, distance) or {}
 
-            if aqi_data:
-                # Ensure numeric types for AQI values
-                aqi_value = aqi_data.get("AQI")
-                fires_enriched.at[idx, "aqi"] = (
-                    float(aqi_value) if aqi_value is not None else None
-                )
-                fires_enriched.at[idx, "aqi_parameter"] = aqi_data.get("ParameterName")
+            # Ensure numeric types for AQI values
+            aqi_value = aqi_data.get("AQI")
+            aqi_values.append(float(aqi_value) if aqi_value is not None else None)
+            aqi_parameters.append(aqi_data.get("ParameterName"))
 
-                category = aqi_data.get("Category", {})
-                fires_enriched.at[idx, "aqi_category"] = category.get("Name")
-                cat_number = category.get("Number")
-                fires_enriched.at[idx, "aqi_category_number"] = (
-                    int(cat_number) if cat_number is not None else None
-                )
+            category = aqi_data.get("Category", {})
+            aqi_categories.append(category.get("Name"))
+            cat_number = category.get("Number")
+            aqi_category_numbers.append(
+                int(cat_number) if cat_number is not None else None
+            )
 
             # Respect rate limits - delay between requests
-            if idx < total_fires - 1:  # Don't delay after last request
+            if i < total_fires - 1:  # Don't delay after last request
                 time.sleep(delay_seconds)
 
             # Progress indicator
-            if (idx + 1) % 10 == 0 or (idx + 1) == 1 or (idx + 1) == total_fires:
+            if (i + 1) % 10 == 0 or (i + 1) == 1 or (i + 1) == total_fires:
                 print(
-                    f"  [{idx + 1}/{total_fires}] Processing AQI data...",
+                    f"  [{i + 1}/{total_fires}] Processing AQI data...",
                     file=sys.stderr,
                     flush=True,
                 )
 
+        # Nullable dtypes keep missing readings as NA instead of object columns
+        fires_enriched = fires_gdf.assign(
+            aqi=pd.array(aqi_values, dtype="Float64"),
+            aqi_parameter=pd.array(aqi_parameters, dtype="string"),
+            aqi_category=pd.array(aqi_categories, dtype="string"),
+            aqi_category_number=pd.array(aqi_category_numbers, dtype="Int32"),
+        )
+
         # Count how many fires got AQI data
         aqi_count = fires_enriched["aqi"].notna().sum()
         print(
@@ -266,9 +277,21 @@ class AirNowClient:
         }
 
         try:
-            response = httpx.get(url, params=params, timeout=10.0)
+            response = self.client.get(url, params=params)
             response.raise_for_status()
             return response.json()
         except httpx.HTTPError as e:
             print(f"Error fetching AirNow forecast for ({latitude}, {longitude}): {e}")
             return None
+
+    def close(self):
+        """Close the HTTP client."""
+        self.client.close()
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
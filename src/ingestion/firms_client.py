@@ -1,10 +1,48 @@
 # src/ingestion/firms_client.py
+import asyncio
 import httpx
+import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List
 import pandas as pd
 import geopandas as gpd
-from shapely.geometry import Point
+
+from src.utils.aio import run_sync
+
+# Explicit dtypes for the FIRMS area CSV (VIIRS and MODIS columns) so the
+# parser skips type inference. acq_date stays a string: pyarrow would otherwise
+# infer a date type that no longer concatenates with acq_time. Coordinates
+# stay float64 because fire IDs are built from their rounded values.
+_FIRMS_DTYPES = {
+    "latitude": "float64",
+    "longitude": "float64",
+    "bright_ti4": "float64",
+    "brightness": "float64",
+    "bright_ti5": "float64",
+    "bright_t31": "float64",
+    "frp": "float64",
+    "acq_date": str,
+    "acq_time": "int32",
+}
+
+# Columns used downstream (risk scoring, database, maps, notebooks); the rest
+# of the CSV (scan, track, instrument, version) is not parsed. VIIRS reports
+# bright_ti4/bright_ti5 and MODIS brightness/bright_t31, so either pair may be
+# present.
+_FIRMS_COLUMNS = [
+    "latitude",
+    "longitude",
+    "bright_ti4",
+    "brightness",
+    "bright_ti5",
+    "bright_t31",
+    "confidence",
+    "frp",
+    "acq_date",
+    "acq_time",
+    "satellite",
+    "daynight",
+]
 
 
 class FIRMSClient:
@@ -14,7 +52,11 @@ class FIRMSClient:
 
     def __init__(self, api_key: str):
         self.api_key = api_key
-        self.client = httpx.Client(timeout=30.0)
+        self.client = httpx.Client(
+            timeout=30.0,
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=8),
+        )
 
     def get_active_fires(
         self,
@@ -33,15 +75,52 @@ class FIRMSClient:
         Returns:
             GeoDataFrame with fire detections
         """
-        url = f"{self.BASE_URL}/{self.api_key}/{source}/{bbox[0]},{bbox[1]},{bbox[2]},{bbox[3]}/{days}"
+        url = self._build_url(bbox, days, source)
 
         response = self.client.get(url)
         response.raise_for_status()
 
-        # Parse CSV response
-        from io import StringIO
+        return self._parse_fires_csv(response.content)
 
-        df = pd.read_csv(StringIO(response.text))
+    def _build_url(
+        self, bbox: tuple[float, float, float, float], days: int, source: str
+    ) -> str:
+        """Build the FIRMS area CSV URL for a bounding box."""
+        return f"{self.BASE_URL}/{self.api_key}/{source}/{bbox[0]},{bbox[1]},{bbox[2]},{bbox[3]}/{days}"
+
+    @staticmethod
+    def _parse_fires_csv(content: bytes) -> gpd.GeoDataFrame:
+        """
+        Parse a FIRMS CSV response into a GeoDataFrame.
+
+        Args:
+            content: Raw CSV body returned by the FIRMS area API
+
+        Returns:
+            GeoDataFrame with fire detections
+        """
+        # Parse the raw bytes; pandas decodes internally, so no str copy of
+        # the body is made
+        from io import BytesIO
+
+        # The pyarrow engine rejects usecols entries missing from the file, so
+        # select from the header actually returned for this source
+        header = content.split(b"\n", 1)[0].decode(errors="replace")
+        usecols = [c for c in header.strip().split(",") if c in _FIRMS_COLUMNS]
+
+        try:
+            df = pd.read_csv(
+                BytesIO(content),
+                engine="pyarrow",
+                usecols=usecols or None,
+                dtype=_FIRMS_DTYPES,
+            )
+        except pd.errors.ParserError as e:
+            # Single-line error messages have no CSV structure for pyarrow
+            raise ValueError(
+                f"Could not parse FIRMS API response: {e}. "
+                f"Response text: {content[:200].decode(errors='replace')}"
+            ) from e
 
         if df.empty:
             return gpd.GeoDataFrame()
@@ -53,23 +132,100 @@ class FIRMSClient:
             raise ValueError(
                 f"FIRMS API response missing expected columns: {missing_cols}. "
                 f"Got columns: {list(df.columns)}. "
-                f"Response text: {response.text[:200]}"
+                f"Response text: {content[:200].decode(errors='replace')}"
             )
 
         # Convert to GeoDataFrame
-        geometry = [Point(xy) for xy in zip(df.longitude, df.latitude)]
+        geometry = gpd.points_from_xy(df["longitude"], df["latitude"])
         gdf = gpd.GeoDataFrame(df, geometry=geometry, crs="EPSG:4326")
 
-        # Add timestamp
+        # Add timestamp: parse each distinct date once and add HHMM as minutes,
+        # avoiding per-row string concatenation and zero-padding
+        acq_time = gdf["acq_time"].to_numpy(dtype=np.int64)
         gdf["acq_datetime"] = pd.to_datetime(
-            gdf["acq_date"] + " " + gdf["acq_time"].astype(str).str.zfill(4),
-            format="%Y-%m-%d %H%M",
-        )
+            gdf["acq_date"], format="%Y-%m-%d", cache=True
+        ) + pd.to_timedelta((acq_time // 100) * 60 + acq_time % 100, unit="m")
 
         return gdf
 
+    def get_active_fires_many(
+        self,
+        regions: Dict[str, tuple[float, float, float, float]],
+        days: int = 1,
+        source: str = "VIIRS_NOAA20_NRT",
+        return_exceptions: bool = False,
+    ) -> Dict[str, gpd.GeoDataFrame | Exception]:
+        """
+        Fetch active fire detections for several regions concurrently.
+
+        Args:
+            regions: Mapping of region name to bbox (west, south, east, north)
+            days: Number of days to look back (1-10)
+            source: Satellite source (VIIRS_NOAA20_NRT or MODIS_NRT)
+            return_exceptions: If True, a failed region maps to its exception
+                instead of the error being raised
+
+        Returns:
+            Dictionary mapping region name to GeoDataFrame with fire detections
+        """
+        return run_sync(self._fetch_all(regions, days, source, return_exceptions))
+
+    async def _fetch_region(
+        self,
+        aclient: httpx.AsyncClient,
+        bbox: tuple[float, float, float, float],
+        days: int,
+        source: str,
+    ) -> bytes:
+        """Download the FIRMS CSV for one region."""
+        response = await aclient.get(self._build_url(bbox, days, source))
+        response.raise_for_status()
+        return response.content
+
+    async def _fetch_all(
+        self,
+        regions: Dict[str, tuple[float, float, float, float]],
+        days: int,
+        source: str,
+        return_exceptions: bool,
+    ) -> Dict[str, gpd.GeoDataFrame | Exception]:
+        """Download all regions at once, then parse each CSV."""
+        async with httpx.AsyncClient(timeout=30.0, http2=True) as aclient:
+            contents = await asyncio.gather(
+                *[
+                    self._fetch_region(aclient, bbox, days, source)
+                    for bbox in regions.values()
+                ],
+                return_exceptions=return_exceptions,
+            )
+
+        results: Dict[str, gpd.GeoDataFrame | Exception] = {}
+        for name, content in zip(regions, contents):
+            if isinstance(content, Exception):
+                results[name] = content
+                continue
+            try:
+                results[name] = self._parse_fires_csv(content)
+            except ValueError as e:
+                if not return_exceptions:
+                    raise
+                results[name] = e
+        return results
+
     def get_continental_us_fires(self, days: int = 1) -> gpd.GeoDataFrame:
         """Get all fires in continental US."""
         # Continental US bounding box
         bbox = (-125, 24, -66, 49)
         return self.get_active_fires(bbox, days)
+
+    def close(self):
+        """Close the HTTP client."""
+        self.client.close()
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
@@ -1,11 +1,27 @@
 # src/ingestion/noaa_client.py
 """Client for NOAA National Weather Service API."""
 
+import asyncio
 import httpx
+import orjson
+import numpy as np
 from typing import Any, Dict, Optional, Tuple
 import pandas as pd
 import geopandas as gpd
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from src.utils.aio import run_sync
+
+# Weather columns added to fires by enrich_fires_with_weather()
+WEATHER_COLUMNS = [
+    "temperature_c",
+    "relative_humidity",
+    "wind_speed_kmh",
+    "wind_direction_deg",
+    "precip_probability",
+    "fire_danger_index",
+    "red_flag_index",
+]
 
 
 class NOAAWeatherClient:
@@ -19,17 +35,49 @@ class NOAAWeatherClient:
         "Accept": "application/geo+json",
     }
 
-    def __init__(self, timeout: float = 30.0):
+    def __init__(self, timeout: float = 30.0, cache_minutes: float = 60.0):
         """
         Initialize NOAA Weather client.
 
         Args:
             timeout: Request timeout in seconds
+            cache_minutes: Minutes to cache point and gridpoint lookups (default 60.0)
         """
+        self.timeout = timeout
+        self.cache_minutes = cache_minutes
+        # HTTP/2 multiplexes concurrent requests over one connection; retries
+        # cover transient connect errors that would otherwise drop a fire's
+        # weather. A custom transport ignores the client's http2/limits
+        # arguments, so they are set on the transport itself.
         self.client = httpx.Client(
-            timeout=timeout, headers=self.HEADERS, follow_redirects=True
+            timeout=timeout,
+            headers=self.HEADERS,
+            follow_redirects=True,
+            transport=httpx.HTTPTransport(
+                http2=True,
+                retries=3,
+                limits=httpx.Limits(max_keepalive_connections=16),
+            ),
         )
 
+        # Nearby fires share an NWS grid cell, so cache point -> grid lookups
+        # keyed on (lat, lon) rounded to ~1km and forecasts by (wfo, x, y)
+        self._point_cache: Dict[tuple, tuple[datetime, Any]] = {}
+        self._grid_cache: Dict[tuple, tuple[datetime, Any]] = {}
+
+    def _get_cached(self, cache: Dict[tuple, tuple[datetime, Any]], key: tuple) -> Any:
+        """Return a cached value, or None if missing or expired."""
+        if key in cache:
+            cache_time, cached_data = cache[key]
+            if datetime.now() - cache_time < timedelta(minutes=self.cache_minutes):
+                return cached_data
+        return None
+
+    @staticmethod
+    def _point_cache_key(latitude: float, longitude: float) -> tuple:
+        """Point cache key at ~1km resolution, well within one NWS grid cell."""
+        return (round(latitude, 2), round(longitude, 2))
+
     def get_point_metadata(self, latitude: float, longitude: float) -> dict[str, Any]:
         """
         Get metadata for a geographic point.
@@ -44,7 +92,7 @@ class NOAAWeatherClient:
         url = f"{self.BASE_URL}/points/{latitude:.4f},{longitude:.4f}"
         response = self.client.get(url)
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
 
     def get_gridpoint_forecast(
         self, wfo: str, grid_x: int, grid_y: int
@@ -64,7 +112,7 @@ class NOAAWeatherClient:
         url = f"{self.BASE_URL}/gridpoints/{wfo}/{grid_x},{grid_y}"
         response = self.client.get(url)
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
 
     def get_station_observation(self, station_id: str) -> dict[str, Any]:
         """
@@ -79,7 +127,7 @@ class NOAAWeatherClient:
         url = f"{self.BASE_URL}/stations/{station_id}/observations/latest"
         response = self.client.get(url)
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
 
     def get_fire_weather_for_point(
         self, latitude: float, longitude: float
@@ -96,7 +144,11 @@ class NOAAWeatherClient:
         """
         try:
             # Step 1: Get point metadata to find grid coordinates
-            point_data = self.get_point_metadata(latitude, longitude)
+            point_key = self._point_cache_key(latitude, longitude)
+            point_data = self._get_cached(self._point_cache, point_key)
+            if point_data is None:
+                point_data = self.get_point_metadata(latitude, longitude)
+                self._point_cache[point_key] = (datetime.now(), point_data)
             properties = point_data.get("properties", {})
 
             # Extract grid information
@@ -108,115 +160,284 @@ class NOAAWeatherClient:
                 return None
 
             # Step 2: Get gridpoint forecast with fire indices
-            forecast_data = self.get_gridpoint_forecast(grid_id, grid_x, grid_y)
-            properties = forecast_data.get("properties", {})
-
-            # Extract fire-relevant data
-            result = {
-                "latitude": latitude,
-                "longitude": longitude,
-                "grid_id": grid_id,
-                "grid_x": grid_x,
-                "grid_y": grid_y,
-                "update_time": properties.get("updateTime"),
-            }
+            grid_key = (grid_id, grid_x, grid_y)
+            forecast_data = self._get_cached(self._grid_cache, grid_key)
+            if forecast_data is None:
+                forecast_data = self.get_gridpoint_forecast(grid_id, grid_x, grid_y)
+                self._grid_cache[grid_key] = (datetime.now(), forecast_data)
+
+            return self._parse_fire_weather(
+                latitude, longitude, grid_id, grid_x, grid_y, forecast_data
+            )
+
+        except (httpx.HTTPError, KeyError, ValueError) as e:
+            # Return None if data unavailable for this location
+            return None
 
-            # Extract current/first values from time series data
-            def get_current_value(data_dict):
-                """Extract the first (current) value from a time series."""
-                if not data_dict or "values" not in data_dict:
-                    return None
-                values = data_dict["values"]
-                if not values or len(values) == 0:
-                    return None
-                return values[0].get("value")
+    @staticmethod
+    def _parse_fire_weather(
+        latitude: float,
+        longitude: float,
+        grid_id: str,
+        grid_x: int,
+        grid_y: int,
+        forecast_data: dict[str, Any],
+    ) -> dict[str, Any]:
+        """Extract fire-relevant values from a gridpoint forecast response."""
+        properties = forecast_data.get("properties", {})
+
+        # Extract fire-relevant data
+        result = {
+            "latitude": latitude,
+            "longitude": longitude,
+            "grid_id": grid_id,
+            "grid_x": grid_x,
+            "grid_y": grid_y,
+            "update_time": properties.get("updateTime"),
+        }
+
+        # Extract current/first values from time series data
+        def get_current_value(data_dict):
+            """Extract the first (current) value from a time series."""
+            if not data_dict or "values" not in data_dict:
+                return None
+            values = data_dict["values"]
+            if not values or len(values) == 0:
+                return None
+            return values[0].get("value")
 
-            # Temperature (convert from Celsius if needed)
-            temp_data = properties.get("temperature", {})
-            result["temperature_c"] = get_current_value(temp_data)
+        # Temperature (convert from Celsius if needed)
+        temp_data = properties.get("temperature", {})
+        result["temperature_c"] = get_current_value(temp_data)
 
-            # Relative Humidity
-            humidity_data = properties.get("relativeHumidity", {})
-            result["relative_humidity"] = get_current_value(humidity_data)
+        # Relative Humidity
+        humidity_data = properties.get("relativeHumidity", {})
+        result["relative_humidity"] = get_current_value(humidity_data)
 
-            # Wind Speed (convert from km/h if needed)
-            wind_speed_data = properties.get("windSpeed", {})
-            result["wind_speed_kmh"] = get_current_value(wind_speed_data)
+        # Wind Speed (convert from km/h if needed)
+        wind_speed_data = properties.get("windSpeed", {})
+        result["wind_speed_kmh"] = get_current_value(wind_speed_data)
 
-            # Wind Direction
-            wind_dir_data = properties.get("windDirection", {})
-            result["wind_direction_deg"] = get_current_value(wind_dir_data)
+        # Wind Direction
+        wind_dir_data = properties.get("windDirection", {})
+        result["wind_direction_deg"] = get_current_value(wind_dir_data)
 
-            # Precipitation Probability
-            precip_data = properties.get("probabilityOfPrecipitation", {})
-            result["precip_probability"] = get_current_value(precip_data)
+        # Precipitation Probability
+        precip_data = properties.get("probabilityOfPrecipitation", {})
+        result["precip_probability"] = get_current_value(precip_data)
 
-            # Fire Weather Indices (if available)
-            fire_danger_data = properties.get("grasslandFireDangerIndex", {})
-            result["fire_danger_index"] = get_current_value(fire_danger_data)
+        # Fire Weather Indices (if available)
+        fire_danger_data = properties.get("grasslandFireDangerIndex", {})
+        result["fire_danger_index"] = get_current_value(fire_danger_data)
 
-            red_flag_data = properties.get("redFlagThreatIndex", {})
-            result["red_flag_index"] = get_current_value(red_flag_data)
+        red_flag_data = properties.get("redFlagThreatIndex", {})
+        result["red_flag_index"] = get_current_value(red_flag_data)
 
-            return result
+        return result
 
-        except (httpx.HTTPError, KeyError, ValueError) as e:
+    async def _get_cached_async(
+        self,
+        client: httpx.AsyncClient,
+        cache: Dict[tuple, tuple[datetime, Any]],
+        key: tuple,
+        url: str,
+        inflight: Dict[tuple, asyncio.Task],
+    ) -> dict[str, Any]:
+        """
+        Fetch JSON through a cache, sharing one request per key in flight.
+
+        Concurrent fires in the same grid cell all await the first request
+        instead of each missing the cache and issuing their own.
+        """
+        cached = self._get_cached(cache, key)
+        if cached is not None:
+            return cached
+
+        task = inflight.get(key)
+        if task is None:
+
+            async def fetch() -> dict[str, Any]:
+                response = await client.get(url)
+                response.raise_for_status()
+                data = orjson.loads(response.content)
+                cache[key] = (datetime.now(), data)
+                return data
+
+            task = inflight[key] = asyncio.ensure_future(fetch())
+
+        return await task
+
+    async def _get_fire_weather_async(
+        self,
+        client: httpx.AsyncClient,
+        latitude: float,
+        longitude: float,
+        inflight: Optional[Dict[tuple, asyncio.Task]] = None,
+    ) -> dict[str, Any] | None:
+        """
+        Async version of get_fire_weather_for_point() using a shared client.
+
+        Args:
+            client: Open httpx.AsyncClient
+            latitude: Latitude in decimal degrees
+            longitude: Longitude in decimal degrees
+            inflight: Requests in flight, shared by concurrent calls on one loop
+
+        Returns:
+            Dictionary with fire weather data or None if unavailable
+        """
+        if inflight is None:
+            inflight = {}
+
+        try:
+            point_key = self._point_cache_key(latitude, longitude)
+            point_data = await self._get_cached_async(
+                client,
+                self._point_cache,
+                point_key,
+                f"{self.BASE_URL}/points/{latitude:.4f},{longitude:.4f}",
+                inflight,
+            )
+            properties = point_data.get("properties", {})
+
+            grid_id = properties.get("gridId")
+            grid_x = properties.get("gridX")
+            grid_y = properties.get("gridY")
+
+            if not all([grid_id, grid_x, grid_y]):
+                return None
+
+            forecast_data = await self._get_cached_async(
+                client,
+                self._grid_cache,
+                (grid_id, grid_x, grid_y),
+                f"{self.BASE_URL}/gridpoints/{grid_id}/{grid_x},{grid_y}",
+                inflight,
+            )
+
+            return self._parse_fire_weather(
+                latitude, longitude, grid_id, grid_x, grid_y, forecast_data
+            )
+
+        except (httpx.HTTPError, KeyError, ValueError):
             # Return None if data unavailable for this location
             return None
 
+    def _async_client(self) -> httpx.AsyncClient:
+        """Create an AsyncClient configured like the sync client."""
+        return httpx.AsyncClient(
+            timeout=self.timeout,
+            headers=self.HEADERS,
+            follow_redirects=True,
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=3,
+                limits=httpx.Limits(max_keepalive_connections=16),
+            ),
+        )
+
+    async def _sample_points_async(
+        self, lats: np.ndarray, lons: np.ndarray, max_concurrency: int
+    ) -> list[dict[str, Any] | None]:
+        """Fetch weather for sample points concurrently, in input order."""
+        semaphore = asyncio.Semaphore(max_concurrency)
+        inflight: Dict[tuple, asyncio.Task] = {}
+
+        async with self._async_client() as client:
+
+            async def fetch(lat: float, lon: float) -> dict[str, Any] | None:
+                async with semaphore:
+                    return await self._get_fire_weather_async(
+                        client, lat, lon, inflight
+                    )
+
+            return await asyncio.gather(
+                *[fetch(lat, lon) for lat, lon in zip(lats, lons)]
+            )
+
+    async def _enrich_async(
+        self, fires_gdf: gpd.GeoDataFrame, max_concurrency: int = 16
+    ) -> gpd.GeoDataFrame:
+        """Fetch weather for all fires concurrently and attach the columns."""
+        import sys
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+        inflight: Dict[tuple, asyncio.Task] = {}
+        total_fires = len(fires_gdf)
+        completed = 0
+
+        async with self._async_client() as client:
+
+            async def fetch(lat: float, lon: float) -> dict[str, Any] | None:
+                nonlocal completed
+                async with semaphore:
+                    weather = await self._get_fire_weather_async(
+                        client, lat, lon, inflight
+                    )
+                completed += 1
+                # Progress logging every 10 fires
+                if completed % 10 == 0 or completed == 1 or completed == total_fires:
+                    print(
+                        f"   [{completed}/{total_fires}] Fetching weather data...",
+                        file=sys.stderr,
+                        flush=True,
+                    )
+                return weather
+
+            # Submit fires in spatial order (~11 km cells) so neighbours that
+            # share a NWS point/gridpoint are scheduled together and hit the
+            # cache or the shared in-flight request
+            lats = fires_gdf["latitude"].to_numpy(dtype=np.float64)
+            lons = fires_gdf["longitude"].to_numpy(dtype=np.float64)
+            order = np.lexsort((np.round(lons, 1), np.round(lats, 1)))
+            sorted_results = await asyncio.gather(
+                *[fetch(lats[i], lons[i]) for i in order],
+                return_exceptions=True,
+            )
+
+        # Restore the original row order
+        results: list[Any] = [None] * total_fires
+        for i, result in zip(order, sorted_results):
+            results[i] = result
+
+        # Nullable Float64 keeps missing readings as NA instead of object columns
+        weather_rows = [r if isinstance(r, dict) else {} for r in results]
+        return fires_gdf.assign(
+            **{
+                col: pd.array([row.get(col) for row in weather_rows], dtype="Float64")
+                for col in WEATHER_COLUMNS
+            }
+        )
+
     def enrich_fires_with_weather(
-        self, fires_gdf: gpd.GeoDataFrame
+        self, fires_gdf: gpd.GeoDataFrame, max_concurrency: int = 16
     ) -> gpd.GeoDataFrame:
         """
         Enrich fire data with current weather conditions from NOAA.
 
         Args:
             fires_gdf: GeoDataFrame with fire locations
+            max_concurrency: Maximum number of fires fetched at once (default 16)
 
         Returns:
             GeoDataFrame with added weather columns
         """
-        fires_gdf = fires_gdf.copy()
-
-        # Initialize weather columns
-        weather_columns = [
-            "temperature_c",
-            "relative_humidity",
-            "wind_speed_kmh",
-            "wind_direction_deg",
-            "precip_probability",
-            "fire_danger_index",
-            "red_flag_index",
-        ]
-
-        for col in weather_columns:
-            fires_gdf[col] = None
-
-        # Fetch weather for each fire location
-        # Note: This can be slow for many fires - consider batching/caching
-        import sys
+        if fires_gdf.empty:
+            # Same output schema as a non-empty result; callers read the
+            # weather columns without checking for them
+            return fires_gdf.assign(
+                **{col: pd.array([], dtype="Float64") for col in WEATHER_COLUMNS}
+            )
 
-        total_fires = len(fires_gdf)
-        for i, (idx, row) in enumerate(fires_gdf.iterrows(), 1):
-            # Progress logging every 10 fires
-            if i % 10 == 0 or i == 1 or i == total_fires:
-                print(
-                    f"   [{i}/{total_fires}] Fetching weather data...",
-                    file=sys.stderr,
-                    flush=True,
-                )
-
-            weather = self.get_fire_weather_for_point(row["latitude"], row["longitude"])
-
-            if weather:
-                for col in weather_columns:
-                    if col in weather and weather[col] is not None:
-                        fires_gdf.at[idx, col] = weather[col]  # pyright: ignore
-
-        return fires_gdf
+        # Requests fan out concurrently (bounded by max_concurrency) instead
+        # of two blocking round-trips per fire
+        return run_sync(self._enrich_async(fires_gdf, max_concurrency))
 
     def get_weather_summary_for_bbox(
-        self, bbox: Tuple[float, float, float, float], sample_points: int = 5
+        self,
+        bbox: Tuple[float, float, float, float],
+        sample_points: int = 5,
+        max_concurrency: int = 16,
     ) -> pd.DataFrame:
         """
         Get weather summary for a bounding box by sampling points.
@@ -224,6 +445,7 @@ class NOAAWeatherClient:
         Args:
             bbox: Bounding box (west, south, east, north)
             sample_points: Number of points to sample in each direction
+            max_concurrency: Maximum number of points fetched at once (default 16)
 
         Returns:
             DataFrame with weather conditions across the region
@@ -231,19 +453,20 @@ class NOAAWeatherClient:
         west, south, east, north = bbox
 
         # Create sample grid
-        import numpy as np
-
-        lats = np.linspace(south, north, sample_points)
-        lons = np.linspace(west, east, sample_points)
+        lat_grid, lon_grid = np.meshgrid(
+            np.linspace(south, north, sample_points),
+            np.linspace(west, east, sample_points),
+            indexing="ij",
+        )
 
-        results = []
-        for lat in lats:
-            for lon in lons:
-                weather = self.get_fire_weather_for_point(lat, lon)
-                if weather:
-                    results.append(weather)
+        # All sample points are fetched concurrently rather than one by one
+        results = run_sync(
+            self._sample_points_async(
+                lat_grid.ravel(), lon_grid.ravel(), max_concurrency
+            )
+        )
 
-        return pd.DataFrame(results)
+        return pd.DataFrame([weather for weather in results if weather])
 
     def close(self):
         """Close the HTTP client."""
@@ -21,13 +21,22 @@ Data Notes:
 - PM2.5 is the primary metric for wildfire smoke
 """
 
+import asyncio
+import math
 import httpx
+import orjson
 from typing import Dict, List, Optional, Any
 import geopandas as gpd
-from shapely.geometry import Point
-from datetime import datetime, timedelta
-import time
+from cachetools import TTLCache
+import numpy as np
 import pandas as pd
+import shapely
+
+from src.utils.aio import AsyncRateLimiter, run_sync
+
+# Above this many fires, sensors are fetched once for the combined bbox and
+# matched to fires locally instead of querying the API per fire
+BATCH_MIN_FIRES = 5
 
 
 class PurpleAirClient:
@@ -59,16 +68,91 @@ class PurpleAirClient:
             )
         self.api_key = api_key
         self.cache_minutes = cache_minutes
-        self._cache: Dict[str, tuple[datetime, Any]] = {}
+        # Bounded TTL cache: entries expire after cache_minutes and the least
+        # recently used are evicted once maxsize is reached
+        self._cache: TTLCache = TTLCache(maxsize=4096, ttl=cache_minutes * 60)
+
+        # Long-lived client so keep-alive connections and TLS sessions are
+        # reused across sensor queries
+        self.client = httpx.Client(
+            http2=True,
+            timeout=10.0,
+            headers={"X-API-Key": api_key},
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+        )
+
+    @staticmethod
+    def _cell(lat: float, lon: float, radius_km: float) -> tuple[float, float, float]:
+        """
+        Snap a location to the cache grid.
+
+        The grid scales with the search radius (0.1° ≈ 11 km for a 50 km
+        radius) so clustered fires share one request.
+
+        Returns:
+            (cell_lat, cell_lon, grid) with the cell center in degrees
+        """
+        grid = max(0.05, radius_km / 500)
+        return round(lat / grid) * grid, round(lon / grid) * grid, grid
 
     def _get_cache_key(self, lat: float, lon: float, radius_km: float) -> str:
-        """Generate cache key for a location query."""
-        return f"{lat:.4f},{lon:.4f},{radius_km}"
+        """Generate cache key for a location query (its grid cell)."""
+        cell_lat, cell_lon, _ = self._cell(lat, lon, radius_km)
+        return f"{cell_lat:.2f},{cell_lon:.2f},{radius_km}"
+
+    @staticmethod
+    def _box_offsets(latitude, radius_km: float) -> tuple:
+        """
+        Half-height and half-width in degrees of the search box at a latitude.
+
+        Accepts a float or a numpy array of latitudes.
+        """
+        lat_offset = radius_km / 111.0  # 1 degree lat ≈ 111 km
+        # Longitude degrees shrink with cos(latitude); clamp near the poles
+        lon_offset = radius_km / (
+            111.0 * np.maximum(np.cos(np.radians(latitude)), 1e-6)
+        )
+        return lat_offset, lon_offset
+
+    def _cell_params(
+        self, latitude: float, longitude: float, radius_km: float
+    ) -> Dict[str, Any]:
+        """
+        Build query parameters covering the search box of every location in
+        the cache cell of (latitude, longitude).
 
-    def _is_cache_valid(self, cache_time: datetime) -> bool:
-        """Check if cached data is still valid."""
-        age = datetime.now() - cache_time
-        return age < timedelta(minutes=self.cache_minutes)
+        The box is centered on the cell, not on the first caller, and padded
+        by half a cell; callers then keep only the sensors in their own box
+        (_sensors_in_box), so results do not depend on which fire in a cell
+        was queried first.
+        """
+        cell_lat, cell_lon, grid = self._cell(latitude, longitude, radius_km)
+        half = grid / 2
+        # Longitude offsets grow toward the pole; size by the cell's pole-most edge
+        lat_offset, lon_offset = self._box_offsets(
+            min(abs(cell_lat) + half, 89.0), radius_km
+        )
+        return self._location_params(
+            cell_lat, cell_lon, lat_offset + half, lon_offset + half
+        )
+
+    def _sensors_in_box(
+        self,
+        sensors: List[Dict[str, Any]],
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+    ) -> List[Dict[str, Any]]:
+        """Keep the cell's sensors that fall in this location's own search box."""
+        lat_offset, lon_offset = self._box_offsets(latitude, radius_km)
+        return [
+            s
+            for s in sensors
+            if s.get("latitude") is not None
+            and s.get("longitude") is not None
+            and abs(s["latitude"] - latitude) <= lat_offset
+            and abs(s["longitude"] - longitude) <= lon_offset
+        ]
 
     def get_sensors_near_location(
         self,
@@ -103,15 +187,31 @@ class PurpleAirClient:
         """
         # Check cache first
         cache_key = self._get_cache_key(latitude, longitude, radius_km)
-        if cache_key in self._cache:
-            cache_time, cached_data = self._cache[cache_key]
-            if self._is_cache_valid(cache_time):
-                return cached_data
+        cached_data = self._cache.get(cache_key)
+        if cached_data is not None:
+            return self._sensors_in_box(cached_data, latitude, longitude, radius_km)
 
-        # Prepare API request
-        # Convert km to miles for PurpleAir API (it uses miles)
-        radius_miles = radius_km * 0.621371
+        params = self._cell_params(latitude, longitude, radius_km)
+
+        try:
+            response = self.client.get(self.BASE_URL, params=params)
+            response.raise_for_status()
 
+            sensors = self._parse_sensors(orjson.loads(response.content))
+
+            # Cache the result (the whole cell)
+            self._cache[cache_key] = sensors
+
+            return self._sensors_in_box(sensors, latitude, longitude, radius_km)
+
+        except httpx.HTTPError as e:
+            print(f"Error fetching PurpleAir data for ({latitude}, {longitude}): {e}")
+            return []
+
+    def _location_params(
+        self, latitude: float, longitude: float, lat_offset: float, lon_offset: float
+    ) -> Dict[str, Any]:
+        """Build query parameters for sensors in a box around a location."""
         # Fields to retrieve from API
         fields = [
             "name",
@@ -125,58 +225,257 @@ class PurpleAirClient:
             "last_seen",
         ]
 
-        params = {
+        params: Dict[str, Any] = {
             "fields": ",".join(fields),
             "location_type": "0",  # 0 = outside sensors only
             "max_age": "3600",  # Only sensors updated in last hour
         }
 
         # Add bounding box (more efficient than radius for API)
-        # Calculate approximate bounding box (simple lat/lon offset)
-        lat_offset = radius_km / 111.0  # 1 degree lat ≈ 111 km
-        lon_offset = radius_km / (
-            111.0 * abs(float(f"{latitude:.6f}".replace("-", "0.01")))
-        )  # Adjust for latitude
-
         params["nwlat"] = latitude + lat_offset
         params["nwlng"] = longitude - lon_offset
         params["selat"] = latitude - lat_offset
         params["selng"] = longitude + lon_offset
 
-        headers = {}
-        if self.api_key:
-            headers["X-API-Key"] = self.api_key
+        return params
 
-        try:
-            response = httpx.get(
-                self.BASE_URL, params=params, headers=headers, timeout=10.0
+    @staticmethod
+    def _parse_sensors(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Turn a PurpleAir ``fields``/``data`` response into sensor dicts."""
+        sensors = []
+        if "data" in data and data["data"]:
+            fields_list = data.get("fields", [])
+            for sensor_data in data["data"]:
+                sensor_dict = dict(zip(fields_list, sensor_data))
+                sensors.append(sensor_dict)
+        return sensors
+
+    async def _get_sensors_near_location_async(
+        self,
+        client: httpx.AsyncClient,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        limiter: AsyncRateLimiter,
+        inflight: Dict[str, asyncio.Task],
+    ) -> List[Dict[str, Any]]:
+        """
+        Async version of get_sensors_near_location() using a shared client.
+
+        Only requests that miss the cache wait on the rate limiter, and fires
+        in the same cache cell share one request in flight.
+        """
+        cache_key = self._get_cache_key(latitude, longitude, radius_km)
+        cached_data = self._cache.get(cache_key)
+        if cached_data is not None:
+            return self._sensors_in_box(cached_data, latitude, longitude, radius_km)
+
+        task = inflight.get(cache_key)
+        if task is None:
+
+            async def fetch() -> List[Dict[str, Any]]:
+                params = self._cell_params(latitude, longitude, radius_km)
+                try:
+                    async with limiter:
+                        response = await client.get(self.BASE_URL, params=params)
+                    response.raise_for_status()
+                except httpx.HTTPError as e:
+                    print(
+                        f"Error fetching PurpleAir data for ({latitude}, {longitude}): {e}"
+                    )
+                    return []
+
+                sensors = self._parse_sensors(orjson.loads(response.content))
+                self._cache[cache_key] = sensors
+                return sensors
+
+            task = inflight[cache_key] = asyncio.ensure_future(fetch())
+
+        return self._sensors_in_box(await task, latitude, longitude, radius_km)
+
+    @staticmethod
+    def _summarize_sensors(
+        lat: float, lon: float, sensors: List[Dict[str, Any]]
+    ) -> tuple[Optional[float], Optional[float], int, Optional[float]]:
+        """
+        Reduce nearby sensors to (pm25, pm25_60min, sensor_count, avg_distance_km).
+        """
+        if not sensors:
+            return None, None, 0, None
+
+        pm25 = pm25_60min = avg_distance_km = None
+        sensor_count = 0
+
+        # Calculate average PM2.5 from nearby sensors
+        # Convert to float to ensure numeric types
+        pm25_values = np.fromiter(
+            (float(s["pm2.5"]) for s in sensors if s.get("pm2.5") is not None),
+            dtype=np.float64,
+        )
+        pm25_60min_values = np.fromiter(
+            (
+                float(s["pm2.5_60minute"])
+                for s in sensors
+                if s.get("pm2.5_60minute") is not None
+            ),
+            dtype=np.float64,
+        )
+
+        if pm25_values.size:
+            pm25 = float(pm25_values.mean())
+            sensor_count = len(sensors)
+
+        if pm25_60min_values.size:
+            pm25_60min = float(pm25_60min_values.mean())
+
+        # Calculate average distance to sensors
+        # Simple distance calculation (approximation)
+        coords = np.array(
+            [
+                (s["latitude"], s["longitude"])
+                for s in sensors
+                if s.get("latitude") and s.get("longitude")
+            ],
+            dtype=np.float64,
+        ).reshape(-1, 2)
+        if coords.size:
+            distances = np.hypot(lat - coords[:, 0], lon - coords[:, 1]) * 111.0
+            avg_distance_km = float(distances.mean())
+
+        return pm25, pm25_60min, sensor_count, avg_distance_km
+
+    async def _enrich_async(
+        self,
+        fires_gdf: gpd.GeoDataFrame,
+        radius_km: float,
+        requests_per_second: float,
+        max_concurrency: int,
+    ) -> List[tuple]:
+        """Fetch sensors for all fires concurrently and summarize each fire."""
+        import sys
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+        limiter = AsyncRateLimiter(requests_per_second, 1.0)
+        inflight: Dict[str, asyncio.Task] = {}
+        total_fires = len(fires_gdf)
+        completed = 0
+
+        async with httpx.AsyncClient(
+            http2=True,
+            timeout=10.0,
+            headers={"X-API-Key": self.api_key},
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+        ) as client:
+
+            async def fetch(lat: float, lon: float) -> tuple:
+                nonlocal completed
+                async with semaphore:
+                    sensors = await self._get_sensors_near_location_async(
+                        client, lat, lon, radius_km, limiter, inflight
+                    )
+                completed += 1
+                # Progress indicator
+                if completed % 10 == 0 or completed == 1 or completed == total_fires:
+                    print(
+                        f"  [{completed}/{total_fires}] Processing PurpleAir data...",
+                        file=sys.stderr,
+                        flush=True,
+                    )
+                return self._summarize_sensors(lat, lon, sensors)
+
+            return await asyncio.gather(
+                *[
+                    fetch(lat, lon)
+                    for lat, lon in zip(fires_gdf["latitude"], fires_gdf["longitude"])
+                ]
             )
-            response.raise_for_status()
 
-            data = response.json()
+    def _enrich_batched(
+        self, fires_gdf: gpd.GeoDataFrame, radius_km: float
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Summarize nearby sensors for every fire from a single bbox request.
 
-            # Parse response
-            sensors = []
-            if "data" in data and data["data"]:
-                fields_list = data.get("fields", [])
-                for sensor_data in data["data"]:
-                    sensor_dict = dict(zip(fields_list, sensor_data))
-                    sensors.append(sensor_dict)
+        Sensors covering all fires (plus radius_km) are fetched once and
+        matched to fires with an STRtree, instead of one API call per fire.
 
-            # Cache the result
-            self._cache[cache_key] = (datetime.now(), sensors)
+        Returns:
+            Arrays (pm25, pm25_60min, sensor_count, avg_distance_km) aligned
+            with fires_gdf; NaN where a fire has no readings
+        """
+        lats = fires_gdf["latitude"].to_numpy(dtype=np.float64)
+        lons = fires_gdf["longitude"].to_numpy(dtype=np.float64)
+        n = len(fires_gdf)
+
+        # Pad the combined extent by the search radius (widest at the pole-most fire)
+        lat_pad = radius_km / 111.0
+        max_abs_lat = min(float(np.abs(lats).max()) + lat_pad, 89.0)
+        lon_pad = radius_km / (111.0 * math.cos(math.radians(max_abs_lat)))
+        bbox = (
+            float(lons.min()) - lon_pad,
+            float(lats.min()) - lat_pad,
+            float(lons.max()) + lon_pad,
+            float(lats.max()) + lat_pad,
+        )
 
-            return sensors
+        empty = np.full(n, np.nan)
+        sensors_gdf = self.get_sensors_for_heatmap(bbox)
+        if sensors_gdf.empty:
+            return empty, empty.copy(), np.zeros(n, dtype=np.int32), empty.copy()
 
-        except httpx.HTTPError as e:
-            print(f"Error fetching PurpleAir data for ({latitude}, {longitude}): {e}")
-            return []
+        def column(name: str) -> np.ndarray:
+            if name not in sensors_gdf.columns:
+                return np.full(len(sensors_gdf), np.nan)
+            return pd.to_numeric(sensors_gdf[name], errors="coerce").to_numpy(
+                dtype=np.float64, na_value=np.nan
+            )
+
+        sensor_lats = column("latitude")
+        sensor_lons = column("longitude")
+
+        # All (fire, sensor) pairs inside each fire's search box: the same
+        # cos(latitude)-corrected box the per-fire path filters to, so batched
+        # and per-fire runs find the same sensors
+        lat_offset, lon_offset = self._box_offsets(lats, radius_km)
+        boxes = shapely.box(
+            lons - lon_offset, lats - lat_offset, lons + lon_offset, lats + lat_offset
+        )
+        tree = shapely.STRtree(sensors_gdf.geometry.values)
+        fire_idx, sensor_idx = tree.query(boxes, predicate="intersects")
+
+        def mean_per_fire(values: np.ndarray) -> np.ndarray:
+            valid = ~np.isnan(values)
+            counts = np.bincount(fire_idx[valid], minlength=n)
+            sums = np.bincount(fire_idx[valid], weights=values[valid], minlength=n)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return np.where(counts > 0, sums / counts, np.nan)
+
+        pm25 = mean_per_fire(column("pm2.5")[sensor_idx])
+        pm25_60min = mean_per_fire(column("pm2.5_60minute")[sensor_idx])
+
+        # Sensor count is reported only for fires with a current reading
+        sensor_count = np.where(
+            np.isnan(pm25), 0, np.bincount(fire_idx, minlength=n)
+        ).astype(np.int32)
+
+        # Simple distance calculation (approximation); skip sensors with a
+        # missing or zero coordinate as the per-fire path does
+        pair_lats = sensor_lats[sensor_idx]
+        pair_lons = sensor_lons[sensor_idx]
+        distances = (
+            np.hypot(lats[fire_idx] - pair_lats, lons[fire_idx] - pair_lons) * 111.0
+        )
+        distances[(pair_lats == 0) | (pair_lons == 0)] = np.nan
+        avg_distance_km = mean_per_fire(distances)
+
+        return pm25, pm25_60min, sensor_count, avg_distance_km
 
     def enrich_fires_with_purpleair(
         self,
         fires_gdf: gpd.GeoDataFrame,
         radius_km: float = 50.0,
-        delay_seconds: float = 0.2,
+        requests_per_second: float = 5.0,
+        max_concurrency: int = 8,
     ) -> gpd.GeoDataFrame:
         """
         Enrich fire data with nearby PurpleAir sensor readings.
@@ -184,7 +483,11 @@ class PurpleAirClient:
         Args:
             fires_gdf: GeoDataFrame with fire detections (must have latitude, longitude)
             radius_km: Search radius in km for nearby sensors (default 50.0 for rural areas)
-            delay_seconds: Delay between API calls to respect rate limits (default 0.2)
+            requests_per_second: API request rate limit for per-fire queries (default 5.0)
+            max_concurrency: Maximum number of requests in flight (default 8)
+
+        More than BATCH_MIN_FIRES fires are served by a single bbox request;
+        smaller inputs query the API per fire.
 
         Returns:
             GeoDataFrame with added PurpleAir columns:
@@ -196,15 +499,7 @@ class PurpleAirClient:
         if fires_gdf.empty:
             return fires_gdf
 
-        fires_enriched = fires_gdf.copy()
-
-        # Initialize new columns
-        fires_enriched["pa_pm25"] = None
-        fires_enriched["pa_pm25_60min"] = None
-        fires_enriched["pa_sensor_count"] = 0
-        fires_enriched["pa_avg_distance_km"] = None
-
-        total_fires = len(fires_enriched)
+        total_fires = len(fires_gdf)
         import sys
 
         print(
@@ -213,64 +508,28 @@ class PurpleAirClient:
             flush=True,
         )
 
-        for idx, row in fires_enriched.iterrows():
-            lat = row["latitude"]
-            lon = row["longitude"]
-
-            # Get nearby sensors
-            sensors = self.get_sensors_near_location(lat, lon, radius_km)
-
-            if sensors:
-                # Calculate average PM2.5 from nearby sensors
-                # Convert to float to ensure numeric types
-                pm25_values = [
-                    float(s.get("pm2.5")) for s in sensors if s.get("pm2.5") is not None
-                ]
-                pm25_60min_values = [
-                    float(s.get("pm2.5_60minute"))
-                    for s in sensors
-                    if s.get("pm2.5_60minute") is not None
-                ]
-
-                if pm25_values:
-                    fires_enriched.at[idx, "pa_pm25"] = float(
-                        sum(pm25_values) / len(pm25_values)
-                    )
-                    fires_enriched.at[idx, "pa_sensor_count"] = int(len(sensors))
-
-                if pm25_60min_values:
-                    fires_enriched.at[idx, "pa_pm25_60min"] = float(
-                        sum(pm25_60min_values) / len(pm25_60min_values)
-                    )
-
-                # Calculate average distance to sensors
-                distances = []
-                for sensor in sensors:
-                    sensor_lat = sensor.get("latitude")
-                    sensor_lon = sensor.get("longitude")
-                    if sensor_lat and sensor_lon:
-                        # Simple distance calculation (approximation)
-                        dist = (
-                            (lat - sensor_lat) ** 2 + (lon - sensor_lon) ** 2
-                        ) ** 0.5 * 111.0
-                        distances.append(dist)
-
-                if distances:
-                    fires_enriched.at[idx, "pa_avg_distance_km"] = float(
-                        sum(distances) / len(distances)
-                    )
-
-            # Respect rate limits - delay between requests
-            if idx < total_fires - 1:  # Don't delay after last request
-                time.sleep(delay_seconds)
-
-            # Progress indicator
-            if (idx + 1) % 10 == 0 or (idx + 1) == 1 or (idx + 1) == total_fires:
-                print(
-                    f"  [{idx + 1}/{total_fires}] Processing PurpleAir data...",
-                    file=sys.stderr,
-                    flush=True,
+        if total_fires > BATCH_MIN_FIRES:
+            # One bbox request for all fires, matched to fires locally
+            pa_pm25, pa_pm25_60min, pa_sensor_count, pa_avg_distance_km = (
+                self._enrich_batched(fires_gdf, radius_km)
+            )
+        else:
+            # Requests overlap up to max_concurrency and are paced by a rate
+            # limiter instead of a fixed sleep after every fire
+            results = run_sync(
+                self._enrich_async(
+                    fires_gdf, radius_km, requests_per_second, max_concurrency
                 )
+            )
+            pa_pm25, pa_pm25_60min, pa_sensor_count, pa_avg_distance_km = zip(*results)
+
+        # Nullable dtypes keep missing readings as NA instead of object columns
+        fires_enriched = fires_gdf.assign(
+            pa_pm25=pd.array(pa_pm25, dtype="Float64"),
+            pa_pm25_60min=pd.array(pa_pm25_60min, dtype="Float64"),
+            pa_sensor_count=pd.array(pa_sensor_count, dtype="Int32"),
+            pa_avg_distance_km=pd.array(pa_avg_distance_km, dtype="Float64"),
+        )
 
         # Count how many fires got PurpleAir data
         pa_count = fires_enriched["pa_pm25"].notna().sum()
@@ -319,17 +578,11 @@ class PurpleAirClient:
             "selng": east,
         }
 
-        headers = {}
-        if self.api_key:
-            headers["X-API-Key"] = self.api_key
-
         try:
-            response = httpx.get(
-                self.BASE_URL, params=params, headers=headers, timeout=10.0
-            )
+            response = self.client.get(self.BASE_URL, params=params)
             response.raise_for_status()
 
-            data = response.json()
+            data = orjson.loads(response.content)
 
             # Parse sensors into GeoDataFrame
             sensors = []
@@ -345,9 +598,7 @@ class PurpleAirClient:
 
             # Create GeoDataFrame
             df = pd.DataFrame(sensors)
-            geometry = [
-                Point(lon, lat) for lon, lat in zip(df["longitude"], df["latitude"])
-            ]
+            geometry = gpd.points_from_xy(df["longitude"], df["latitude"])
             gdf = gpd.GeoDataFrame(df, geometry=geometry, crs="EPSG:4326")
 
             print(f"Found {len(gdf)} PurpleAir sensors in region")
@@ -356,3 +607,15 @@ class PurpleAirClient:
         except httpx.HTTPError as e:
             print(f"Error fetching PurpleAir sensors for bbox {bbox}: {e}")
             return gpd.GeoDataFrame()
+
+    def close(self):
+        """Close the HTTP client."""
+        self.client.close()
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
@@ -0,0 +1,66 @@
+# src/utils/aio.py
+"""Asyncio helpers: running coroutines from sync code and pacing requests."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Coroutine, TypeVar
+
+T = TypeVar("T")
+
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Run a coroutine to completion and return its result.
+
+    Uses asyncio.run() when no event loop is running. When called from inside
+    a running loop (MCP tools, Gradio handlers), the coroutine runs on a fresh
+    loop in a worker thread so the caller's loop is not re-entered.
+
+    Args:
+        coro: Coroutine to run
+
+    Returns:
+        The coroutine's return value
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+
+class AsyncRateLimiter:
+    """
+    Async context manager that spaces entries to at most ``rate`` per ``period``.
+
+    Each entry reserves the next free time slot and sleeps until it arrives, so
+    concurrent tasks are released at a steady rate rather than in bursts. Use
+    one instance per event loop.
+
+    Example:
+        limiter = AsyncRateLimiter(5, 1.0)
+        async with limiter:
+            response = await client.get(url)
+    """
+
+    def __init__(self, rate: float, period: float = 1.0):
+        """
+        Args:
+            rate: Maximum number of entries per period
+            period: Length of the period in seconds (default 1.0)
+        """
+        self._interval = period / rate
+        self._next_slot = 0.0
+
+    async def __aenter__(self) -> "AsyncRateLimiter":
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self._interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        return None
@@ -24,20 +24,23 @@ regions = {
 
 print("Checking for active fires worldwide (last 24 hours):\n")
 
+# All regions are downloaded concurrently
+results = client.get_active_fires_many(regions, days=1, return_exceptions=True)
+
 total_fires = 0
-for region_name, bbox in regions.items():
-    try:
-        fires = client.get_active_fires(bbox, days=1)
-        count = len(fires)
-        total_fires += count
-        status = "🔥" if count > 0 else "  "
-        print(f"{status} {region_name:25} {count:5} fires")
-
-        if count > 0 and count <= 5:
-            print(
-                f"     Locations: {list(zip(fires['latitude'].values, fires['longitude'].values))}"
-            )
-    except Exception as e:
-        print(f"   {region_name:25} ERROR: {e}")
+for region_name, fires in results.items():
+    if isinstance(fires, Exception):
+        print(f"   {region_name:25} ERROR: {fires}")
+        continue
+
+    count = len(fires)
+    total_fires += count
+    status = "🔥" if count > 0 else "  "
+    print(f"{status} {region_name:25} {count:5} fires")
+
+    if count > 0 and count <= 5:
+        print(
+            f"     Locations: {list(zip(fires['latitude'].values, fires['longitude'].values))}"
+        )
 
 print(f"\nTotal fires detected worldwide: {total_fires}")
@@ -2,21 +2,28 @@
 Gradio Web Interface for Wildfire Risk Monitoring System
 
 Combines LLM chat interface with interactive map visualization.
-Uses Qwen2.5:14b via Ollama for natural language interaction with MCP tools.
+Uses Qwen2.5:14b via Ollama for natural language interaction with MCP tools,
+or any OpenAI-compatible llama.cpp server when LLAMA_SERVER_URL is set.
 """
 
 import gradio as gr
-import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import geopandas as gpd
+import httpx
+import numpy as np
+import shapely
 import pandas as pd
 from pathlib import Path
-import json
+import orjson
 import os
-from typing import List, Tuple, Optional
+from typing import AsyncIterator, List, Tuple, Optional
 import asyncio
+import atexit
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 
 # Ollama for LLM
 try:
@@ -33,6 +40,8 @@ import sys
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from src.database import init_database
+from src.database.connection import close_connection
 from mcp_server.tools import (
     fetch_fires_tool,
     enrich_weather_tool,
@@ -46,9 +55,24 @@ from mcp_server.tools import (
 class WildfireAssistant:
     """LLM-powered assistant with access to wildfire monitoring tools."""
 
-    def __init__(self, model="qwen2.5:14b"):
+    # Most history messages sent with a request
+    MAX_CONTEXT_MESSAGES = 10
+
+    def __init__(self, model="qwen2.5:14b", llama_server_url: Optional[str] = None):
         self.model = model
-        self.conversation_history = []
+        # Only the context window is kept, so memory stays bounded. This is
+        # the default history; the web UI passes one per browser session.
+        self.conversation_history = deque()
+
+        # A llama.cpp server (llama-server serving a Q4_K_M GGUF) decodes much
+        # faster than Ollama's default FP16 weights; Ollama stays the default
+        self.llama_server_url = llama_server_url or os.getenv("LLAMA_SERVER_URL")
+        if self.llama_server_url:
+            self._llama_client = httpx.AsyncClient(
+                base_url=self.llama_server_url, timeout=120.0
+            )
+        else:
+            self._ollama_client = ollama.AsyncClient()
 
         # Define available tools for the LLM
         self.tools = {
@@ -96,6 +120,12 @@ class WildfireAssistant:
             },
         }
 
+        # Rendered once so every turn sends a byte-identical prefix, which lets
+        # the backend reuse the system prompt's KV cache instead of re-prefilling
+        self._system_prompt = self.get_system_prompt()
+        self._response_schema = self.get_response_schema()
+        self._warmed_up = False
+
     def get_system_prompt(self) -> str:
         """Generate system prompt with tool descriptions."""
         tools_desc = "\n".join(
@@ -113,13 +143,16 @@ TERMINOLOGY GUIDE:
 
 IMPORTANT RULES:
 1. Call ONE tool at a time. Wait for the result before calling another tool.
-2. Use ONLY valid JSON format for tool calls.
+2. Always respond with ONLY valid JSON: either a tool call or a reply.
 3. After getting a tool result, explain it to the user in natural language.
 4. For multi-step requests, tell the user you're doing the FIRST step and will do the rest after.
 
 When a user asks to perform an action, respond with ONLY a JSON function call:
 {{"tool": "tool_name", "arguments": {{"param": "value"}}}}
 
+Otherwise, respond with:
+{{"reply": "your answer to the user"}}
+
 Examples:
 - "Fetch fires in California" → {{"tool": "fetch_fires", "arguments": {{"region": "california"}}}}
 - "Fetch fires and weather in California" → {{"tool": "fetch_fires", "arguments": {{"region": "california", "use_weather": true}}}}
@@ -133,278 +166,445 @@ Examples:
 IMPORTANT: The fetch_fires tool can optionally include weather/AQI/PM2.5 during the initial fetch using use_weather, use_aqi, use_purpleair parameters.
 Alternatively, you can fetch fires first, then use the separate enrich_* tools to add data afterward.
 
-If the user asks a general question, answer directly without using tools.
+If the user asks a general question, answer directly in "reply" without using tools.
 """
 
-    async def chat(self, user_message: str) -> Tuple[str, Optional[dict]]:
+    def get_response_schema(self) -> dict:
+        """
+        JSON schema for the first completion of each turn.
+
+        The reply is either a call to one of the known tools (with only that
+        tool's parameters) or {"reply": "..."} prose, so decoding constrained
+        to this schema always parses.
+        """
+        tool_calls = [
+            {
+                "type": "object",
+                "properties": {
+                    "tool": {"const": name},
+                    "arguments": {
+                        "type": "object",
+                        "properties": {param: {} for param in info["parameters"]},
+                        "additionalProperties": False,
+                    },
+                },
+                "required": ["tool", "arguments"],
+                "additionalProperties": False,
+            }
+            for name, info in self.tools.items()
+        ]
+        prose = {
+            "type": "object",
+            "properties": {"reply": {"type": "string"}},
+            "required": ["reply"],
+            "additionalProperties": False,
+        }
+        return {"anyOf": [*tool_calls, prose]}
+
+    async def _complete(
+        self, messages: List[dict], schema: Optional[dict] = None
+    ) -> str:
+        """
+        Run one chat completion on the configured backend.
+
+        Temperature 0 keeps tool-call JSON deterministic.
+
+        Args:
+            messages: Chat messages to send
+            schema: Optional JSON schema the output is constrained to; both
+                backends compile it to a grammar applied during decoding
+
+        Returns:
+            Assistant message text
+        """
+        if self.llama_server_url:
+            # cache_prompt reuses the KV of the longest matching prompt prefix
+            payload = {
+                "model": self.model,
+                "messages": messages,
+                "temperature": 0,
+                "cache_prompt": True,
+            }
+            if schema is not None:
+                payload["response_format"] = {
+                    "type": "json_schema",
+                    "json_schema": {"name": "assistant_turn", "schema": schema},
+                }
+            response = await self._llama_client.post(
+                "/v1/chat/completions", json=payload
+            )
+            response.raise_for_status()
+            return response.json()["choices"][0]["message"]["content"]
+
+        response = await self._ollama_client.chat(
+            model=self.model,
+            messages=messages,
+            format=schema,
+            options={"temperature": 0},
+            keep_alive="30m",  # Keep weights and context loaded between turns
+        )
+        return response["message"]["content"]
+
+    async def warm_up(self):
+        """
+        Load the model and prefill the system prompt before the first message.
+
+        Ollama loads weights lazily on first use. A one-token completion over
+        the system prompt loads them and leaves the prompt's KV cached (on
+        either backend), so the first user turn only prefills its own message.
+        Runs once; later calls return immediately.
+        """
+        import sys
+
+        if self._warmed_up:
+            return
+        self._warmed_up = True
+
+        messages = [{"role": "system", "content": self._system_prompt}]
+        try:
+            if self.llama_server_url:
+                response = await self._llama_client.post(
+                    "/v1/chat/completions",
+                    json={
+                        "model": self.model,
+                        "messages": messages,
+                        "max_tokens": 1,
+                        "cache_prompt": True,
+                    },
+                )
+                response.raise_for_status()
+            else:
+                await self._ollama_client.chat(
+                    model=self.model,
+                    messages=messages,
+                    options={"num_predict": 1},
+                    keep_alive="30m",
+                )
+            print(f"[LLM] {self.model} loaded", file=sys.stderr, flush=True)
+        except Exception as e:
+            print(f"[LLM] Warm-up failed: {e}", file=sys.stderr, flush=True)
+
+    async def _complete_stream(self, messages: List[dict]) -> AsyncIterator[str]:
+        """
+        Stream an unconstrained completion from the configured backend.
+
+        Args:
+            messages: Chat messages to send
+
+        Yields:
+            Text deltas as the backend decodes them
+        """
+        if self.llama_server_url:
+            payload = {
+                "model": self.model,
+                "messages": messages,
+                "temperature": 0,
+                "cache_prompt": True,
+                "stream": True,
+            }
+            async with self._llama_client.stream(
+                "POST", "/v1/chat/completions", json=payload
+            ) as response:
+                response.raise_for_status()
+                # Server-sent events: one "data: {chunk}" line per delta, then
+                # "data: [DONE]"
+                async for line in response.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    data = line[len("data: ") :]
+                    if data == "[DONE]":
+                        break
+                    delta = orjson.loads(data)["choices"][0]["delta"]
+                    if delta.get("content"):
+                        yield delta["content"]
+            return
+
+        stream = await self._ollama_client.chat(
+            model=self.model,
+            messages=messages,
+            options={"temperature": 0},
+            keep_alive="30m",
+            stream=True,
+        )
+        async for part in stream:
+            yield part["message"]["content"]
+
+    @staticmethod
+    def summarize_tool_result(tool_name: str, tool_result: dict) -> Optional[str]:
+        """
+        Describe a tool result without an LLM call, where a template suffices.
+
+        Returns:
+            User-facing summary, or None if the LLM should explain the result
+        """
+        if tool_result.get("status") != "success":
+            return f"The {tool_name} tool failed: {tool_result.get('message', 'unknown error')}"
+
+        if tool_name == "get_fire_stats":
+            risk = ", ".join(
+                f"{count} {category}"
+                for category, count in tool_result.get("risk_breakdown", {}).items()
+            )
+            enrichment = tool_result.get("enrichment_status", {})
+            return (
+                f"There are {tool_result.get('total_fires', 0)} fires "
+                f"({tool_result.get('date_range', 'unknown dates')}). "
+                f"Risk breakdown: {risk or 'none'}. "
+                f"Enriched with weather: {enrichment.get('weather', 0)}, "
+                f"AQI: {enrichment.get('aqi', 0)}, "
+                f"PM2.5: {enrichment.get('purpleair', 0)}."
+            )
+
+        if tool_name in ("enrich_weather", "enrich_aqi", "enrich_purpleair"):
+            return f"{tool_result['message']}. Refresh the map to see the new data."
+
+        if tool_name == "visualize_fires":
+            return f"{tool_result['message']}."
+
+        # fetch_fires results are explained by the LLM so it can suggest the
+        # next step of multi-step requests
+        return None
+
+    @staticmethod
+    def parse_turn(raw_message: str) -> dict:
+        """
+        Parse a schema-constrained completion into a tool call or reply.
+
+        Constrained output is strict JSON and parses directly. If a backend
+        ignored the schema, a JSON object embedded in prose is tried before
+        treating the whole output as a plain reply.
+        """
+        try:
+            turn = orjson.loads(raw_message)
+        except orjson.JSONDecodeError:
+            start, end = raw_message.find("{"), raw_message.rfind("}") + 1
+            try:
+                turn = orjson.loads(raw_message[start:end]) if start >= 0 else None
+            except orjson.JSONDecodeError:
+                turn = None
+        if not isinstance(turn, dict):
+            turn = {"reply": raw_message}
+        return turn
+
+    def _context_window(self, history: deque) -> deque:
+        """
+        History messages to send with the next request.
+
+        A window sliding by one each turn (deque(maxlen=...)) changes the
+        first message every time, so no cached prompt prefix survives.
+        Instead the oldest messages are dropped in a block (down to half)
+        once the history exceeds MAX_CONTEXT_MESSAGES: in between, each
+        request extends the previous prompt and the backend only prefills
+        the new messages.
+        """
+        if len(history) > self.MAX_CONTEXT_MESSAGES:
+            for _ in range(len(history) - self.MAX_CONTEXT_MESSAGES // 2):
+                history.popleft()
+        return history
+
+    async def chat(
+        self, user_message: str, history: Optional[deque] = None
+    ) -> Tuple[str, Optional[dict]]:
         """
         Process user message and execute tools if needed.
 
+        Args:
+            user_message: Message from the user
+            history: Conversation to continue (default: conversation_history)
+
         Returns:
             (response_text, tool_result_dict)
         """
+        response, tool_result = "", None
+        async for response, tool_result in self.chat_stream(user_message, history):
+            pass
+        return response, tool_result
+
+    async def chat_stream(
+        self, user_message: str, history: Optional[deque] = None
+    ) -> AsyncIterator[Tuple[str, Optional[dict]]]:
+        """
+        Process user message and execute tools if needed, yielding progress.
+
+        The tool-call completion is constrained JSON and is awaited whole; the
+        explanation of a tool result is streamed token by token.
+
+        Args:
+            user_message: Message from the user
+            history: Conversation to continue (default: conversation_history);
+                concurrent sessions must each pass their own
+
+        Yields:
+            (response_text_so_far, tool_result_dict)
+        """
         import sys
 
         print(f"\n[LLM] User: {user_message}", file=sys.stderr, flush=True)
 
+        if history is None:
+            history = self.conversation_history
+
         # Add user message to history
-        self.conversation_history.append({"role": "user", "content": user_message})
+        history.append({"role": "user", "content": user_message})
 
         # Prepare messages for LLM
         messages = [
-            {"role": "system", "content": self.get_system_prompt()},
-            *self.conversation_history[-10:],  # Keep last 10 messages for context
+            {"role": "system", "content": self._system_prompt},
+            *self._context_window(history),
         ]
 
-        # Get LLM response
+        # Get LLM response, constrained to a tool call or a prose reply
         try:
             print(f"[LLM] Querying {self.model}...", file=sys.stderr, flush=True)
-            response = ollama.chat(
-                model=self.model,
-                messages=messages,
-            )
-            assistant_message = response["message"]["content"]
+            raw_message = await self._complete(messages, self._response_schema)
             print(
-                f"[LLM] Response: {assistant_message[:200]}...",
+                f"[LLM] Response: {raw_message[:200]}...",
                 file=sys.stderr,
                 flush=True,
             )
         except Exception as e:
             print(f"[LLM] Error: {e}", file=sys.stderr, flush=True)
-            return f"Error communicating with LLM: {str(e)}", None
+            yield f"Error communicating with LLM: {str(e)}", None
+            return
+
+        turn = self.parse_turn(raw_message)
 
-        # Check if response contains a tool call
         tool_result = None
-        assistant_message_stripped = assistant_message.strip()
+        assistant_message = turn.get("reply", raw_message)
 
-        # Handle multi-line responses - extract just the JSON if present
-        if "{" in assistant_message_stripped and "tool" in assistant_message_stripped:
-            print(
-                f"[TOOL] Detected potential tool call in response",
-                file=sys.stderr,
-                flush=True,
-            )
+        if "tool" in turn:
+            tool_name = turn.get("tool")
+            tool_args = turn.get("arguments") or {}
 
-            # Try to extract JSON from the response
-            start = assistant_message_stripped.find("{")
-            end = assistant_message_stripped.rfind("}") + 1
+            if tool_name in self.tools:
+                print(
+                    f"[TOOL] Executing {tool_name} with args: {tool_args}",
+                    file=sys.stderr,
+                    flush=True,
+                )
 
-            if start != -1 and end > start:
-                json_str = assistant_message_stripped[start:end]
+                yield f"Running {tool_name}...", None
+
+                # Execute tool
+                tool_fn = self.tools[tool_name]["function"]
+                result_json = await tool_fn(tool_args)
+                tool_result = orjson.loads(result_json)
+
+                print(
+                    f"[TOOL] Result: {tool_result.get('message', 'Success')}",
+                    file=sys.stderr,
+                    flush=True,
+                )
 
-                # Handle multiple JSONs on separate lines - take only the first
-                if "\n{" in json_str:
-                    json_str = json_str[: json_str.find("\n{")]
-                    if not json_str.endswith("}"):
-                        json_str += "}"
+                # Templated summaries skip a second LLM round-trip
+                assistant_message = self.summarize_tool_result(tool_name, tool_result)
 
-                try:
+                if assistant_message is None:
+                    # Generate natural language response about the result
                     print(
-                        f"[TOOL] Parsing tool call: {json_str}",
+                        f"[LLM] Asking LLM to explain result...",
                         file=sys.stderr,
                         flush=True,
                     )
-                    tool_call = json.loads(json_str)
-                    tool_name = tool_call.get("tool")
-                    tool_args = tool_call.get("arguments", {})
-
-                    if tool_name in self.tools:
-                        print(
-                            f"[TOOL] Executing {tool_name} with args: {tool_args}",
-                            file=sys.stderr,
-                            flush=True,
-                        )
-
-                        # Execute tool
-                        tool_fn = self.tools[tool_name]["function"]
-                        result_json = await tool_fn(tool_args)
-                        tool_result = json.loads(result_json)
+                    explain_messages = messages + [
+                        {"role": "assistant", "content": raw_message},
+                        {
+                            "role": "user",
+                            "content": f"Tool result: {result_json}\n\nExplain this result to the user in 2-3 sentences. DO NOT include any new tool calls - just explain what happened.",
+                        },
+                    ]
+
+                    try:
+                        assistant_message = ""
+                        async for token in self._complete_stream(explain_messages):
+                            assistant_message += token
+                            yield assistant_message, tool_result
 
                         print(
-                            f"[TOOL] Result: {tool_result.get('message', 'Success')}",
+                            f"[LLM] Explanation: {assistant_message}",
                             file=sys.stderr,
                             flush=True,
                         )
 
-                        # Generate natural language response about the result
-                        print(
-                            f"[LLM] Asking LLM to explain result...",
-                            file=sys.stderr,
-                            flush=True,
-                        )
-                        explain_messages = messages + [
-                            {"role": "assistant", "content": json_str},
-                            {
-                                "role": "user",
-                                "content": f"Tool result: {result_json}\n\nExplain this result to the user in 2-3 sentences. DO NOT include any new tool calls - just explain what happened.",
-                            },
-                        ]
-
-                        try:
-                            explain_response = ollama.chat(
-                                model=self.model,
-                                messages=explain_messages,
-                            )
-                            assistant_message = explain_response["message"]["content"]
-
+                        # Check if the explanation contains a follow-up tool call
+                        # (for multi-step requests like "fetch fires and add weather")
+                        if "{" in assistant_message and "tool" in assistant_message:
                             print(
-                                f"[LLM] Explanation: {assistant_message}",
+                                f"[LLM] Follow-up tool call detected in explanation. User should send another message to continue.",
                                 file=sys.stderr,
                                 flush=True,
                             )
-
-                            # Check if the explanation contains a follow-up tool call
-                            # (for multi-step requests like "fetch fires and add weather")
-                            if "{" in assistant_message and "tool" in assistant_message:
-                                print(
-                                    f"[LLM] Follow-up tool call detected in explanation. User should send another message to continue.",
-                                    file=sys.stderr,
-                                    flush=True,
-                                )
-                                # Note: We don't execute it here - the user will see the explanation
-                                # and the chat loop will pick up the tool call on the next interaction
-                        except Exception as e:
-                            print(
-                                f"[LLM] Error generating explanation: {e}",
-                                file=sys.stderr,
-                                flush=True,
-                            )
-                            # Fallback to simple message from tool result
-                            assistant_message = tool_result.get(
-                                "message", "Tool executed successfully."
-                            )
-                    else:
+                            # Note: We don't execute it here - the user will see the explanation
+                            # and the chat loop will pick up the tool call on the next interaction
+                    except Exception as e:
                         print(
-                            f"[TOOL] Unknown tool: {tool_name}",
+                            f"[LLM] Error generating explanation: {e}",
                             file=sys.stderr,
                             flush=True,
                         )
-                        assistant_message = f"I tried to use a tool '{tool_name}' but it's not available. Available tools: {', '.join(self.tools.keys())}"
-
-                except json.JSONDecodeError as e:
-                    print(f"[TOOL] JSON parse error: {e}", file=sys.stderr, flush=True)
-                    print(
-                        f"[TOOL] Attempted to parse: {json_str}",
-                        file=sys.stderr,
-                        flush=True,
-                    )
-                    # Not valid JSON, return the original message
+                        # Fallback to simple message from tool result
+                        assistant_message = tool_result.get(
+                            "message", "Tool executed successfully."
+                        )
+            else:
+                print(
+                    f"[TOOL] Unknown tool: {tool_name}",
+                    file=sys.stderr,
+                    flush=True,
+                )
+                assistant_message = f"I tried to use a tool '{tool_name}' but it's not available. Available tools: {', '.join(self.tools.keys())}"
 
         # Add assistant response to history
-        self.conversation_history.append(
-            {"role": "assistant", "content": assistant_message}
-        )
+        history.append({"role": "assistant", "content": assistant_message})
+
+        yield assistant_message, tool_result
+
+
+_FIRES_FILE = Path("data/processed/active_fires.geojson")
+
+# Attribute columns the map figures use (colors, heatmap weights, hovers);
+# pyogrio skips the rest of the fields while parsing. Names absent from the
+# file (e.g. aqi before enrichment) are ignored.
+_MAP_COLUMNS = [
+    "risk_score",
+    "risk_category",
+    "confidence",
+    "bright_ti4",
+    "aqi",
+    "pa_pm25",
+]
+
 
-        return assistant_message, tool_result
+class _PreEncodedFigure(go.Figure):
+    """
+    Figure that encodes its JSON once and reuses it.
+
+    gr.Plot calls to_json() every time a figure is rendered. Cached map
+    figures are never modified after being built, so repeated refreshes and
+    map-type toggles reuse the first encoding (plotly's orjson engine).
+    """
+
+    def __init__(self, fig: go.Figure):
+        super().__init__(fig)
+        self._encoded_json = None
+
+    def to_json(self, *args, **kwargs) -> str:
+        if args or kwargs:
+            return super().to_json(*args, **kwargs)
+        if self._encoded_json is None:
+            self._encoded_json = super().to_json()
+        return self._encoded_json
 
 
 def load_current_map(map_type: str = "basic") -> go.Figure:
     """Load and display the current fire map."""
     try:
-        data_dir = Path("data/processed")
-        fires_file = data_dir / "active_fires.geojson"
-
         # Check if file exists before trying to read
-        if not fires_file.exists():
+        if not _FIRES_FILE.exists():
             return create_empty_map("No fire data available. Fetch fires to begin.")
 
-        fires_gdf = gpd.read_file(fires_file)
-
-        fires_df = fires_gdf.copy()
-        fires_df["lon"] = fires_df.geometry.x
-        fires_df["lat"] = fires_df.geometry.y
-
-        center_lat = fires_df["lat"].mean()
-        center_lon = fires_df["lon"].mean()
-
-        if map_type == "basic":
-            fig = px.scatter_map(
-                fires_df,
-                lat="lat",
-                lon="lon",
-                color="risk_category",
-                color_discrete_map={
-                    "Low": "yellow",
-                    "Moderate": "orange",
-                    "High": "red",
-                },
-                hover_data=["risk_score", "confidence", "bright_ti4"],
-                zoom=5,
-                center={"lat": center_lat, "lon": center_lon},
-                title=f"Active Fires ({len(fires_df)} detections)",
-                map_style="carto-positron",
-            )
-        elif map_type == "risk_heatmap":
-            fig = px.density_map(
-                fires_df,
-                lat="lat",
-                lon="lon",
-                z="risk_score",
-                radius=15,
-                zoom=5,
-                center={"lat": center_lat, "lon": center_lon},
-                color_continuous_scale="YlOrRd",
-                title="Fire Risk Heatmap",
-                map_style="carto-positron",
-            )
-            fig.update_layout(margin=dict(l=0, r=0, t=30, b=0), autosize=True)
-        elif map_type == "aqi":
-            # Check if AQI column exists and has data
-            if "aqi" in fires_df.columns:
-                fires_aqi = fires_df[fires_df["aqi"].notna()]
-                if len(fires_aqi) > 0:
-                    fig = px.density_map(
-                        fires_aqi,
-                        lat="lat",
-                        lon="lon",
-                        z="aqi",
-                        radius=15,
-                        zoom=5,
-                        center={"lat": center_lat, "lon": center_lon},
-                        color_continuous_scale="YlOrRd",
-                        title=f"AQI Heatmap ({len(fires_aqi)} fires with data)",
-                        map_style="carto-positron",
-                    )
-                    fig.update_layout(margin=dict(l=0, r=0, t=30, b=0), autosize=True)
-                else:
-                    return create_empty_map(
-                        "No AQI data available. Use 'Add AQI' to enrich fires."
-                    )
-            else:
-                return create_empty_map(
-                    "No AQI data available. Use 'Add AQI' to enrich fires."
-                )
-        elif map_type == "purpleair":
-            # Check if PurpleAir column exists and has data
-            if "pa_pm25" in fires_df.columns:
-                fires_pa = fires_df[fires_df["pa_pm25"].notna()]
-                if len(fires_pa) > 0:
-                    fig = px.density_map(
-                        fires_pa,
-                        lat="lat",
-                        lon="lon",
-                        z="pa_pm25",
-                        radius=15,
-                        zoom=5,
-                        center={"lat": center_lat, "lon": center_lon},
-                        color_continuous_scale="YlOrRd",
-                        title=f"PM2.5 Heatmap ({len(fires_pa)} fires with data)",
-                        map_style="carto-positron",
-                    )
-                    fig.update_layout(margin=dict(l=0, r=0, t=30, b=0), autosize=True)
-                else:
-                    return create_empty_map(
-                        "No PurpleAir data available. Use 'Add particulate data' to enrich fires."
-                    )
-            else:
-                return create_empty_map(
-                    "No PurpleAir data available. Use 'Add particulate data' to enrich fires."
-                )
-        else:
-            fig = create_empty_map("Unknown map type")
-
-        fig.update_layout(height=600)
-        return fig
+        # Keyed on mtime so a rewritten file is picked up on the next call
+        return _build_map(_FIRES_FILE.stat().st_mtime_ns, map_type)
 
     except Exception as e:
         import sys
@@ -413,6 +613,204 @@ def load_current_map(map_type: str = "basic") -> go.Figure:
         return create_empty_map("Error loading map. Check terminal for details.")
 
 
+@lru_cache(maxsize=1)
+def _load_fires_df(mtime_ns: int) -> Tuple[pd.DataFrame, dict, frozenset]:
+    """
+    Read the current fires file with lon/lat columns added.
+
+    Cached per file version so all map types share a single parse.
+
+    Returns:
+        (fires_df, map_center, enrichment columns that have data)
+    """
+    fires_gdf = gpd.read_file(_FIRES_FILE, engine="pyogrio", columns=_MAP_COLUMNS)
+
+    fires_df = fires_gdf.copy()
+    # One vectorized GEOS call instead of per-point .x/.y access
+    coords = shapely.get_coordinates(fires_gdf.geometry.values)
+    fires_df["lon"] = coords[:, 0].astype(np.float32)
+    fires_df["lat"] = coords[:, 1].astype(np.float32)
+
+    # float32 is plenty for plotting and halves the typed arrays plotly sends
+    # to the browser; hover labels format these values so float32 rounding
+    # noise (57.29999923706055) is not displayed
+    for col in ("risk_score", "bright_ti4", "aqi", "pa_pm25"):
+        if col in fires_df.columns and pd.api.types.is_float_dtype(fires_df[col]):
+            fires_df[col] = fires_df[col].astype(np.float32)
+
+    center_lon, center_lat = coords.mean(axis=0)
+
+    # Probe enrichment once per file version; map types dispatch on the set
+    enriched = frozenset(
+        col
+        for col in ("aqi", "pa_pm25")
+        if col in fires_df.columns and fires_df[col].notna().any()
+    )
+    return fires_df, {"lat": center_lat, "lon": center_lon}, enriched
+
+
+@lru_cache(maxsize=8)
+def _build_map(mtime_ns: int, map_type: str) -> go.Figure:
+    """Build the figure for one map type from one version of the fires file."""
+    fires_df, center, enriched = _load_fires_df(mtime_ns)
+
+    if map_type == "basic":
+        fig = _risk_scatter_map(fires_df, center)
+        fig.update_layout(title=f"Active Fires ({len(fires_df)} detections)")
+    elif map_type == "risk_heatmap":
+        fig = _density_map(
+            fires_df["lat"].to_numpy(),
+            fires_df["lon"].to_numpy(),
+            fires_df["risk_score"].to_numpy(),
+            center=center,
+            label="risk_score",
+            value_format=".1f",
+        )
+        fig.update_layout(title="Fire Risk Heatmap")
+    elif map_type == "aqi":
+        if "aqi" in enriched:
+            fires_aqi = _finite_points(fires_df, "aqi")
+            fig = _density_map(
+                fires_aqi["lat"],
+                fires_aqi["lon"],
+                fires_aqi["aqi"],
+                center=center,
+                label="aqi",
+                value_format=".0f",
+            )
+            fig.update_layout(
+                title=f"AQI Heatmap ({len(fires_aqi['aqi'])} fires with data)"
+            )
+        else:
+            return create_empty_map(
+                "No AQI data available. Use 'Add AQI' to enrich fires."
+            )
+    elif map_type == "purpleair":
+        if "pa_pm25" in enriched:
+            fires_pa = _finite_points(fires_df, "pa_pm25")
+            fig = _density_map(
+                fires_pa["lat"],
+                fires_pa["lon"],
+                fires_pa["pa_pm25"],
+                center=center,
+                label="pa_pm25",
+                value_format=".1f",
+            )
+            fig.update_layout(
+                title=f"PM2.5 Heatmap ({len(fires_pa['pa_pm25'])} fires with data)"
+            )
+        else:
+            return create_empty_map(
+                "No PurpleAir data available. Use 'Add particulate data' to enrich fires."
+            )
+    else:
+        fig = create_empty_map("Unknown map type")
+
+    fig.update_layout(height=600)
+    return _PreEncodedFigure(fig)
+
+
+_RISK_COLORS = {"Low": "yellow", "Moderate": "orange", "High": "red", "Unknown": "gray"}
+
+# Hover fields for the basic map, with their number formats (None: as is).
+# Coordinates are float32, so they are always formatted.
+_RISK_HOVER_FIELDS = {"risk_score": ":.1f", "confidence": None, "bright_ti4": ":.1f"}
+
+
+def _risk_scatter_map(fires_df: pd.DataFrame, center: dict) -> go.Figure:
+    """
+    Scatter map of fires with one trace per risk category.
+
+    Traces are built from the DataFrame's arrays with go.Scattermap directly,
+    skipping plotly express's per-column DataFrame introspection.
+    """
+    lat = fires_df["lat"].to_numpy()
+    lon = fires_df["lon"].to_numpy()
+    # pd.cut leaves fires outside the risk bins (e.g. risk_score 0) without a
+    # category; NaN never equals itself, so give them a named bucket to keep
+    # them on the map
+    category = fires_df["risk_category"].astype(object)
+    category = category.where(category.notna(), "Unknown").to_numpy()
+
+    hover_fields = [f for f in _RISK_HOVER_FIELDS if f in fires_df.columns]
+    customdata = (
+        np.column_stack([fires_df[f].to_numpy() for f in hover_fields])
+        if hover_fields
+        else None
+    )
+    hover = "".join(
+        f"<br>{field}=%{{customdata[{i}]{_RISK_HOVER_FIELDS[field] or ''}}}"
+        for i, field in enumerate(hover_fields)
+    )
+
+    fig = go.Figure()
+    for value in pd.unique(category):
+        mask = category == value
+        fig.add_trace(
+            go.Scattermap(
+                lat=lat[mask],
+                lon=lon[mask],
+                mode="markers",
+                name=str(value),
+                legendgroup=str(value),
+                marker=dict(color=_RISK_COLORS.get(value)),
+                customdata=customdata[mask] if customdata is not None else None,
+                hovertemplate=f"risk_category={value}<br>lat=%{{lat:.4f}}"
+                f"<br>lon=%{{lon:.4f}}{hover}<extra></extra>",
+            )
+        )
+    fig.update_layout(
+        legend_title_text="risk_category",
+        map=dict(style="carto-positron", center=center, zoom=5),
+    )
+    return fig
+
+
+def _density_map(
+    lat: np.ndarray,
+    lon: np.ndarray,
+    z: np.ndarray,
+    center: dict,
+    label: str,
+    value_format: str,
+) -> go.Figure:
+    """Density heatmap of z weighted points, built with go.Densitymap directly."""
+    fig = go.Figure(
+        go.Densitymap(
+            lat=lat,
+            lon=lon,
+            z=z,
+            radius=15,
+            colorscale="YlOrRd",
+            colorbar=dict(title=dict(text=label)),
+            hovertemplate=f"{label}=%{{z:{value_format}}}<br>lat=%{{lat:.4f}}"
+            "<br>lon=%{lon:.4f}<extra></extra>",
+        )
+    )
+    fig.update_layout(
+        map=dict(style="carto-positron", center=center, zoom=5),
+        margin=dict(l=0, r=0, t=30, b=0),
+        autosize=True,
+    )
+    return fig
+
+
+def _finite_points(fires_df: pd.DataFrame, column: str) -> dict:
+    """
+    Coordinates and values of the fires with a finite value in column.
+
+    A numpy mask over the column's array replaces notna() plus a DataFrame
+    subset.
+    """
+    values = fires_df[column].to_numpy(dtype=np.float32, na_value=np.nan)
+    mask = np.isfinite(values)
+    return {
+        "lat": fires_df["lat"].to_numpy()[mask],
+        "lon": fires_df["lon"].to_numpy()[mask],
+        column: values[mask],
+    }
+
+
 def create_empty_map(message: str) -> go.Figure:
     """Create an empty map with a message."""
     fig = go.Figure()
@@ -433,43 +831,44 @@ def create_empty_map(message: str) -> go.Figure:
     return fig
 
 
-def clear_all_data() -> tuple[str, go.Figure]:
+def clear_all_data(conn=None) -> tuple[str, go.Figure]:
     """
     Clear all fire data from database and delete GeoJSON files.
 
+    Args:
+        conn: Open DuckDB connection to reuse; if None, the database is
+            initialized from DATABASE_PATH
+
     Returns:
         (status_message, empty_map)
     """
     import sys
-    from src.database import init_database
 
     try:
         print("[CLEAR] Starting data cleanup...", file=sys.stderr, flush=True)
 
         # Clear database
-        db_path = os.getenv("DATABASE_PATH", "data/wildfire.duckdb")
-        conn = init_database(db_path)
-
-        # Count records before deletion
-        deleted_buffers = conn.execute("SELECT COUNT(*) FROM fire_buffers").fetchone()[
-            0
-        ]
-        deleted_fires = conn.execute("SELECT COUNT(*) FROM fires").fetchone()[0]
-
-        # Delete all records from tables
-        conn.execute("DELETE FROM fire_buffers")
-        conn.execute("DELETE FROM fires")
-
-        conn.commit()
+        if conn is None:
+            db_path = os.getenv("DATABASE_PATH", "data/wildfire.duckdb")
+            conn = init_database(db_path)
+
+        # This runs in a worker thread while tools may use the shared
+        # connection on the event loop; a DuckDB connection is not safe for
+        # concurrent use, so work through this thread's own cursor
+        with conn.cursor() as cursor:
+            # Delete all records from tables; DuckDB returns the deleted row
+            # count as the statement result (cursor.rowcount is always -1)
+            deleted_buffers = cursor.execute("DELETE FROM fire_buffers").fetchone()[0]
+            deleted_fires = cursor.execute("DELETE FROM fires").fetchone()[0]
+            cursor.commit()
         print(
             f"[CLEAR] Deleted {deleted_fires} fires and {deleted_buffers} buffers from database",
             file=sys.stderr,
             flush=True,
         )
 
-        # Delete GeoJSON files
+        # Delete GeoJSON files and HTML visualization files
         data_dir = Path("data/processed")
-        deleted_files = []
 
         geojson_files = [
             "active_fires.geojson",
@@ -477,20 +876,24 @@ def clear_all_data() -> tuple[str, go.Figure]:
             "excluded_industrial_fires.geojson",
             "region_metadata.json",
         ]
+        paths = [data_dir / filename for filename in geojson_files]
+        paths += data_dir.glob("fires_*.html")
+
+        def unlink(path: Path) -> bool:
+            # Like unlink(missing_ok=True), but reports whether a file was removed
+            try:
+                path.unlink()
+                return True
+            except FileNotFoundError:
+                return False
 
-        for filename in geojson_files:
-            filepath = data_dir / filename
-            if filepath.exists():
-                filepath.unlink()
-                deleted_files.append(filename)
-                print(f"[CLEAR] Deleted {filename}", file=sys.stderr, flush=True)
+        # Unlinks are independent I/O, so issue them concurrently
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            removed = list(pool.map(unlink, paths))
 
-        # Delete HTML visualization files
-        html_files = list(data_dir.glob("fires_*.html"))
-        for filepath in html_files:
-            filepath.unlink()
-            deleted_files.append(filepath.name)
-            print(f"[CLEAR] Deleted {filepath.name}", file=sys.stderr, flush=True)
+        deleted_files = [path.name for path, ok in zip(paths, removed) if ok]
+        for filename in deleted_files:
+            print(f"[CLEAR] Deleted {filename}", file=sys.stderr, flush=True)
 
         print(f"[CLEAR] ✓ Data cleanup complete", file=sys.stderr, flush=True)
 
@@ -511,6 +914,14 @@ def create_gradio_app():
     # Initialize assistant
     assistant = WildfireAssistant(model="qwen2.5:14b")
 
+    # Open the database once (extension load, schema check) and reuse it
+    try:
+        db_conn = init_database(os.getenv("DATABASE_PATH", "data/wildfire.duckdb"))
+        atexit.register(close_connection)
+    except Exception as e:
+        print(f"⚠️  Could not open database at startup: {e}")
+        db_conn = None
+
     # Custom CSS for better styling
     custom_css = """
     .gradio-container {
@@ -588,35 +999,47 @@ def create_gradio_app():
                 refresh_btn = gr.Button("🔄 Refresh Map", size="sm")
 
         # Chat interaction
-        async def respond(message, chat_history):
-            """Process user message and update chat."""
+        # LLM context per browser session, so concurrent users' turns never
+        # mix in one history (or in one cached prompt prefix)
+        llm_history = gr.State(deque)
+
+        async def respond(message, chat_history, session_history):
+            """Process user message and stream the response into the chat."""
             # Add user message to chat (using messages format)
             chat_history = chat_history or []
             chat_history.append({"role": "user", "content": message})
-
-            # Get assistant response
-            response, tool_result = await assistant.chat(message)
-
-            # Add assistant response to chat
-            chat_history.append({"role": "assistant", "content": response})
-
-            return "", chat_history, tool_result if tool_result else gr.update()
+            chat_history.append({"role": "assistant", "content": ""})
+
+            # Re-render on each partial response so text shows from the first
+            # token instead of after the whole completion
+            async for partial, tool_result in assistant.chat_stream(
+                message, session_history
+            ):
+                chat_history[-1]["content"] = partial
+                yield (
+                    "",
+                    chat_history,
+                    tool_result if tool_result else gr.update(),
+                    session_history,
+                )
 
         # Event handlers
         submit_btn.click(
             respond,
-            inputs=[msg, chatbot],
-            outputs=[msg, chatbot, status_box],
+            inputs=[msg, chatbot, llm_history],
+            outputs=[msg, chatbot, status_box, llm_history],
         )
 
         msg.submit(
             respond,
-            inputs=[msg, chatbot],
-            outputs=[msg, chatbot, status_box],
+            inputs=[msg, chatbot, llm_history],
+            outputs=[msg, chatbot, status_box, llm_history],
         )
 
-        def update_map(map_type):
-            return load_current_map(map_type)
+        async def update_map(map_type):
+            # Figure building is CPU work; keep it off the event loop so chat
+            # streaming continues while a map renders
+            return await asyncio.to_thread(load_current_map, map_type)
 
         map_selector.change(
             update_map,
@@ -633,7 +1056,7 @@ def create_gradio_app():
         # Clear data button
         def handle_clear_data():
             """Handle clear data button click."""
-            status_msg, empty_map = clear_all_data()
+            status_msg, empty_map = clear_all_data(db_conn)
             return (
                 status_msg,
                 gr.update(visible=True),
@@ -649,43 +1072,71 @@ def create_gradio_app():
 
         # Load initial map
         app.load(
-            lambda: load_current_map("basic"),
+            update_map,
+            inputs=[map_selector],
             outputs=[map_plot],
         )
 
+        # Load the model while the first visitor is still reading the page
+        app.load(assistant.warm_up)
+
+    # Let chat streams (llama-server --parallel 4) and map renders overlap
+    app.queue(default_concurrency_limit=4)
+
     return app
 
 
-if __name__ == "__main__":
-    # Check if Ollama is running
+def check_llama_server(url: str):
+    """Exit unless the llama.cpp server at url reports healthy."""
     try:
-        response = ollama.list()
-        # Handle both dict response and ListResponse object
-        if hasattr(response, "models"):
-            available_models = [m.model for m in response.models]
-        else:
-            available_models = [m["name"] for m in response.get("models", [])]
-
+        response = httpx.get(f"{url.rstrip('/')}/health", timeout=5.0)
+        response.raise_for_status()
+        print(f"✓ llama.cpp server ready at {url}")
+    except httpx.HTTPError as e:
+        print(f"❌ Error: Could not reach llama.cpp server at {url}. Is it running?")
         print(
-            f"✓ Found {len(available_models)} Ollama models: {', '.join(available_models)}"
+            "   Start: llama-server --model qwen2.5-14b-instruct-q4_k_m.gguf "
+            "--n-gpu-layers -1 --parallel 4 --cont-batching --port 8080"
         )
+        print(f"   Error: {e}")
+        exit(1)
 
-        if "qwen2.5:14b" not in available_models:
-            print("⚠️  qwen2.5:14b not found. Pulling model...")
-            print("This may take a while (model is ~9GB)")
-            ollama.pull("qwen2.5:14b")
-            print("✓ Model pulled successfully!")
-        else:
-            print("✓ qwen2.5:14b model found")
 
-    except Exception as e:
-        print(f"❌ Error: Could not connect to Ollama. Is it running?")
-        print(f"   Install: https://ollama.ai")
-        print(f"   Error: {e}")
-        import traceback
+if __name__ == "__main__":
+    llama_server_url = os.getenv("LLAMA_SERVER_URL")
 
-        traceback.print_exc()
-        exit(1)
+    if llama_server_url:
+        check_llama_server(llama_server_url)
+    else:
+        # Check if Ollama is running
+        try:
+            response = ollama.list()
+            # Handle both dict response and ListResponse object
+            if hasattr(response, "models"):
+                available_models = [m.model for m in response.models]
+            else:
+                available_models = [m["name"] for m in response.get("models", [])]
+
+            print(
+                f"✓ Found {len(available_models)} Ollama models: {', '.join(available_models)}"
+            )
+
+            if "qwen2.5:14b" not in available_models:
+                print("⚠️  qwen2.5:14b not found. Pulling model...")
+                print("This may take a while (model is ~9GB)")
+                ollama.pull("qwen2.5:14b")
+                print("✓ Model pulled successfully!")
+            else:
+                print("✓ qwen2.5:14b model found")
+
+        except Exception as e:
+            print(f"❌ Error: Could not connect to Ollama. Is it running?")
+            print(f"   Install: https://ollama.ai")
+            print(f"   Error: {e}")
+            import traceback
+
+            traceback.print_exc()
+            exit(1)
 
     # Launch app
     app = create_gradio_app()